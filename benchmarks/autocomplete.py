@@ -0,0 +1,70 @@
+"""
+Memory footprint and lookup latency of the in-memory name index, against the
+same prefix search in the database.
+
+    $ python benchmarks/autocomplete.py [rows]
+"""
+import sys
+import time
+import random
+import tracemalloc
+from common import app, db, reset_db
+from models import Planet
+from autocomplete import PrefixIndex
+from serializers import PlanetRow, planet_columns
+
+CHUNK = 50_000
+SYLLABLES = ["ta", "too", "ine", "al", "der", "aan", "na", "boo", "ho", "th", "cor", "us", "ka", "shy", "yk"]
+
+
+def seed(n, rng):
+    reset_db()
+    with app.app_context():
+        planets = db.metadata.tables["planets"]
+        names = set()
+        while len(names) < n:
+            names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))) + f" {len(names)}")
+        names = list(names)
+        for start in range(0, n, CHUNK):
+            db.session.execute(planets.insert(), [{"name_planet": name} for name in names[start:start + CHUNK]])
+        db.session.commit()
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[int(len(samples) * p / 100)] * 1e6 for p in (50, 99)]
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    seed(rows, rng)
+    prefixes = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 2))) for _ in range(2000)]
+
+    with app.app_context():
+        index = PrefixIndex(Planet, Planet.name_planet, PlanetRow)
+        tracemalloc.start()
+        start = time.perf_counter()
+        index.build()
+        build = time.perf_counter() - start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{rows} planets: built in {build * 1000:.0f} ms, "
+              f"{memory / 2**20:.1f} MB ({memory / rows:.0f} bytes/name)")
+
+        samples = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.complete(prefix, 10)
+            samples.append(time.perf_counter() - start)
+        p50, p99 = percentiles(samples)
+        print(f"index lookup      p50 {p50:9.1f} us  p99 {p99:9.1f} us")
+
+        samples = []
+        for prefix in prefixes[:200]:
+            statement = planet_columns().where(db.func.lower(Planet.name_planet).like(prefix + "%")).limit(10)
+            start = time.perf_counter()
+            db.session.execute(statement).all()
+            samples.append(time.perf_counter() - start)
+        p50, p99 = percentiles(samples)
+        print(f"database LIKE     p50 {p50:9.1f} us  p99 {p99:9.1f} us")
@@ -0,0 +1,43 @@
+"""
+Shared helpers for the benchmark scripts: points the app to a throwaway
+database (unless DATABASE_URL is set) and counts the SQL statements executed.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC))
+
+if os.getenv("DATABASE_URL") is None:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+# the benchmarks send bursts of writes from one client
+os.environ.setdefault("RATELIMIT_ENABLED", "0")
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+
+app = create_app()
+
+
+def reset_db():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+@contextmanager
+def count_queries():
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
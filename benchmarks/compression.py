@@ -0,0 +1,79 @@
+"""
+Bytes on the wire and CPU time per request for /users, /planets and /peoples pages
+of several sizes, uncompressed and with every gzip level / brotli quality.
+Also compares a compressed cache hit (variant stored next to the body) with
+compressing the cached body on every request.
+
+    $ python benchmarks/compression.py
+"""
+import time
+import gzip
+from common import app, db, reset_db
+from datagen import generate
+from favorites import rebuild_counts
+from compression import brotli
+import cache
+import compression
+
+PAGE_SIZES = (10, 100, 1000)
+ENDPOINTS = ("/users", "/planets", "/peoples")
+REPEAT = 20
+
+
+def seed():
+    reset_db()
+    with app.app_context():
+        generate(2_000, 2_000, 2_000, 20_000, report=lambda line: None)
+        rebuild_counts()
+        db.session.commit()
+
+
+def cpu_per_request(client, url, headers):
+    # process time, not wall time: what compression costs the worker
+    start = time.process_time()
+    for _ in range(REPEAT):
+        response = client.get(url, headers=headers)
+    return (time.process_time() - start) / REPEAT, response
+
+
+def variants():
+    yield "identity", {}, lambda: None
+    for level in (1, 6, 9):
+        yield f"gzip {level}", {"Accept-Encoding": "gzip"}, lambda level=level: setattr(compression, "GZIP_LEVEL", level)
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f"br {quality}", {"Accept-Encoding": "br"}, \
+                lambda quality=quality: setattr(compression, "BROTLI_LEVEL", quality)
+
+
+if __name__ == "__main__":
+    seed()
+    client = app.test_client()
+    cache.CACHE_ENABLED = False
+
+    print(f"cache off, cpu ms per request (mean of {REPEAT}), min size {compression.COMPRESSION_MIN_SIZE} bytes")
+    for endpoint in ENDPOINTS:
+        for limit in PAGE_SIZES:
+            url = f"{endpoint}?limit={limit}"
+            baseline = None
+            for name, headers, configure in variants():
+                configure()
+                cpu, response = cpu_per_request(client, url, headers)
+                if baseline is None:
+                    baseline = (cpu, len(response.data))
+                print(f"  {url:18} {name:9} {len(response.data):9} bytes ({len(response.data) / baseline[1]:6.1%})  "
+                      f"cpu {cpu * 1000:7.2f} ms  (+{(cpu - baseline[0]) * 1000:6.2f})")
+            compression.GZIP_LEVEL, compression.BROTLI_LEVEL = 6, 4
+
+    # a cache hit serves the stored compressed variant, no compression at all
+    cache.CACHE_ENABLED = True
+    url = "/planets?limit=1000"
+    client.get(url, headers={"Accept-Encoding": "gzip"})
+    hit, response = cpu_per_request(client, url, {"Accept-Encoding": "gzip"})
+    body = client.get(url).data
+    start = time.process_time()
+    for _ in range(REPEAT):
+        gzip.compress(body, compresslevel=compression.GZIP_LEVEL, mtime=0)
+    recompress = (time.process_time() - start) / REPEAT
+    print(f"\n{url} cache hit with stored gzip variant {hit * 1000:.2f} ms cpu, "
+          f"compressing on every hit would add {recompress * 1000:.2f} ms")
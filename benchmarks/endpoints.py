@@ -0,0 +1,268 @@
+"""
+Benchmark of every route of src/app.py against generated databases of several sizes.
+For each endpoint: throughput, p50/p95/p99 latency, queries per request and
+(with --allocations) bytes allocated per request. Results are saved as JSON and can
+be compared with a previous run.
+
+    $ python benchmarks/endpoints.py --sizes small,medium --output results.json
+    $ python benchmarks/endpoints.py --compare results.json --threshold 0.2
+    $ DATABASE_URL=postgresql://... python benchmarks/endpoints.py
+    $ python benchmarks/endpoints.py --server http://127.0.0.1:3000 --sizes medium   # running gunicorn
+
+The database is dropped and generated again for every size (flask seed generate).
+With --server the server must use the same DATABASE_URL; queries per request and
+allocations are only measured in process.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import http.client
+from urllib.parse import urlsplit
+from datetime import datetime, timezone
+from common import app, db, reset_db, count_queries
+from datagen import generate
+from favorites import rebuild_counts
+import cache
+
+SIZES = {
+    "small": {"users": 100, "planets": 100, "peoples": 100, "favorites": 1_000},
+    "medium": {"users": 10_000, "planets": 1_000, "peoples": 1_000, "favorites": 100_000},
+    "large": {"users": 100_000, "planets": 10_000, "peoples": 10_000, "favorites": 1_000_000},
+}
+
+
+class Scenario:
+    """
+    Builds request i of every endpoint. Write endpoints work on rows created by the
+    benchmark itself (created planets are the ones deleted later), so every run
+    sees the same data.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.created = {"users": [], "planets": [], "peoples": []}
+        self.favorites = {"planets": [], "peoples": []}
+
+    def user(self, i):
+        return 1 + i % self.size["users"]
+
+    def item(self, kind, i):
+        return 1 + (i * 7919) % self.size[kind]
+
+    def requests(self):
+        # (endpoint, function i -> (method, url, json)), in the order they run
+        return [
+            ("sitemap", lambda i: ("GET", "/", None)),
+            ("healthz", lambda i: ("GET", "/healthz", None)),
+            ("healthz_pool", lambda i: ("GET", "/healthz/pool", None)),
+            ("cache_stats", lambda i: ("GET", "/cache/stats", None)),
+            ("metrics", lambda i: ("GET", "/metrics", None)),
+            ("get_users", lambda i: ("GET", "/users", None)),
+            ("get_user", lambda i: ("GET", f"/users/{self.user(i)}", None)),
+            ("get_favorite", lambda i: ("GET", f"/users/{self.user(i)}/favorites", None)),
+            ("get_fav_planets", lambda i: ("GET", f"/users/{self.user(i)}/favorites/planets", None)),
+            ("get_fav_peoples", lambda i: ("GET", f"/users/{self.user(i)}/favorites/peoples", None)),
+            ("get_planets", lambda i: ("GET", "/planets", None)),
+            ("get_planet", lambda i: ("GET", f"/planets/{self.item('planets', i)}", None)),
+            ("get_all_peoples", lambda i: ("GET", "/peoples", None)),
+            ("get_person", lambda i: ("GET", f"/peoples/{self.item('peoples', i)}", None)),
+            ("top_planets", lambda i: ("GET", "/planets/top", None)),
+            ("top_peoples", lambda i: ("GET", "/peoples/top", None)),
+            ("autocomplete_planets", lambda i: ("GET", "/autocomplete/planets?q=ta", None)),
+            ("autocomplete_peoples", lambda i: ("GET", "/autocomplete/peoples?q=ta", None)),
+            ("create_user", lambda i: ("POST", "/users", {
+                "name": "bench", "last_name": "bench", "email": f"bench{i}@bench.com", "password": "bench"})),
+            ("login", lambda i: ("POST", "/login", {
+                "email": f"user{self.user(i)}@example.com", "password": "not-a-real-password"})),
+            ("create_planet", lambda i: ("POST", "/planets", {"name_planet": f"bench planet {i}"})),
+            ("create_people", lambda i: ("POST", "/peoples", {"name_people": f"bench people {i}"})),
+            ("create_users_bulk", lambda i: ("POST", "/users/bulk", [
+                {"name": "bench", "last_name": "bench", "email": f"bulk{i}-{n}@bench.com", "password": "bench"}
+                for n in range(10)])),
+            ("create_planets_bulk", lambda i: ("POST", "/planets/bulk", [
+                {"name_planet": f"bulk planet {i}-{n}"} for n in range(10)])),
+            ("create_peoples_bulk", lambda i: ("POST", "/peoples/bulk", [
+                {"name_people": f"bulk people {i}-{n}"} for n in range(10)])),
+            ("add_fav_planet", self.add_favorite("planets")),
+            ("add_fav_people", self.add_favorite("peoples")),
+            ("update_favorites", lambda i: ("PATCH", f"/users/{self.user(i)}/favorites", {
+                "add_planets": [self.item("planets", i + n) for n in range(10)],
+                "remove_planets": [self.item("planets", i + n) for n in range(10)]})),
+            ("delete_fav_planet", self.delete_favorite("planets")),
+            ("delete_fav_people", self.delete_favorite("peoples")),
+            ("delete_user", self.delete_created("users")),
+            ("delete_planet", self.delete_created("planets")),
+            ("delete_people", self.delete_created("peoples")),
+        ]
+
+    def add_favorite(self, kind):
+        def build(i):
+            user, item = self.user(i), self.size[kind] - i % self.size[kind]
+            self.favorites[kind].append((user, item))
+            return "POST", f"/users/{user}/favorites/{kind}/{item}", None
+        return build
+
+    def delete_favorite(self, kind):
+        def build(i):
+            user, item = self.favorites[kind].pop()
+            return "DELETE", f"/users/{user}/favorites/{kind}/{item}", None
+        return build
+
+    def delete_created(self, kind):
+        def build(i):
+            return "DELETE", f"/{kind}/{self.created[kind].pop()}", None
+        return build
+
+    def record(self, endpoint, response_json):
+        # keep the ids of the rows created by the benchmark, to delete them later
+        kind = {"create_user": "users", "create_planet": "planets", "create_people": "peoples"}.get(endpoint)
+        if kind and isinstance(response_json, dict) and "id" in response_json:
+            self.created[kind].append(response_json["id"])
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def seed(size):
+    reset_db()
+    with app.app_context():
+        generate(size["users"], size["planets"], size["peoples"], size["favorites"], report=lambda line: None)
+        rebuild_counts()
+        db.session.commit()
+
+
+def http_request(server, method, url, body):
+    parts = urlsplit(server)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method, url, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, json.loads(data) if data.startswith((b"{", b"[")) else None
+
+
+def run_endpoint(client, server, scenario, endpoint, build, repeat, allocations):
+    latencies, queries, allocated, statuses = [], [], [], {}
+    for i in range(repeat):
+        method, url, body = build(i)
+        if allocations:
+            tracemalloc.start()
+        with count_queries() as statements:
+            start = time.perf_counter()
+            if server:
+                status, response_json = http_request(server, method, url, body)
+            else:
+                response = client.open(url, method=method, json=body)
+                status, response_json = response.status_code, response.get_json(silent=True)
+            latencies.append(time.perf_counter() - start)
+        if allocations:
+            allocated.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        queries.append(len(statements))
+        statuses[status] = statuses.get(status, 0) + 1
+        scenario.record(endpoint, response_json)
+
+    total = sum(latencies)
+    return {
+        "requests": repeat,
+        "throughput": repeat / total if total else None,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries_per_request": None if server else sum(queries) / repeat,
+        "allocated_bytes": max(allocated) if allocated else None,
+        "status": {str(code): count for code, count in statuses.items()},
+    }
+
+
+def run(args):
+    results = {}
+    client = app.test_client()
+    with app.app_context():
+        covered = set()
+        for size_name in args.sizes:
+            size = SIZES[size_name]
+            seed(size)
+            scenario = Scenario(size)
+            results[size_name] = {}
+            print(f"\n{size_name}: {size}")
+            for endpoint, build in scenario.requests():
+                stats = run_endpoint(client, args.server, scenario, endpoint, build, args.repeat, args.allocations)
+                results[size_name][endpoint] = stats
+                covered.add(endpoint)
+                queries = stats["queries_per_request"]
+                print(f"  {endpoint:22} {stats['throughput']:9.1f} req/s  p50 {stats['p50_ms']:8.2f}  "
+                      f"p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms  "
+                      f"queries {'-' if queries is None else f'{queries:5.1f}'}  {stats['status']}")
+
+        missing = {
+            rule.endpoint.rpartition(".")[2] for rule in app.url_map.iter_rules()
+            if not rule.rule.startswith("/admin") and rule.endpoint != "static"
+        } - covered
+        if missing:
+            print(f"\nnot benchmarked: {', '.join(sorted(missing))}")
+
+        return {
+            "meta": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "database": db.engine.dialect.name,
+                "server": args.server or "flask test client",
+                "python": platform.python_version(),
+                "repeat": args.repeat,
+                "cache": cache.CACHE_ENABLED,
+            },
+            "results": results,
+        }
+
+
+def compare(baseline, current, threshold):
+    """Endpoints whose p50 latency or queries per request grew more than threshold (0.2 = 20%)."""
+    regressions = []
+    for size, endpoints in current["results"].items():
+        for endpoint, stats in endpoints.items():
+            before = baseline["results"].get(size, {}).get(endpoint)
+            if before is None:
+                continue
+            for metric in ("p50_ms", "queries_per_request"):
+                if before.get(metric) and stats.get(metric) is not None and \
+                        stats[metric] > before[metric] * (1 + threshold):
+                    regressions.append(f"{size} {endpoint} {metric}: {before[metric]:.2f} -> {stats[metric]:.2f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="small,medium", type=lambda value: value.split(","))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--server", help="base url of a running server, instead of the Flask test client")
+    parser.add_argument("--allocations", action="store_true", help="measure allocations (slower)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.no_cache:
+        cache.CACHE_ENABLED = False
+
+    current = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+        print(f"\nresults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), current, args.threshold)
+        if regressions:
+            print(f"\nregressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regression over {args.threshold:.0%}")
@@ -0,0 +1,68 @@
+"""
+Per-user favorites lookups with 100k favorites: the previous unscoped
+select(FavPlanet) against the query scoped through favorites.user_id.
+
+    $ python benchmarks/favorites_lookup.py [users] [favorites_per_user]
+"""
+import sys
+import time
+from sqlalchemy import select, text
+from common import app, db, reset_db, count_queries
+from models import Favorite, FavPlanet
+
+
+def seed(users, per_user):
+    reset_db()
+    with app.app_context():
+        tables = db.metadata.tables
+        db.session.execute(tables["planets"].insert(),
+                           [{"name_planet": f"planet {i}"} for i in range(per_user)])
+        db.session.execute(tables["users"].insert(),
+                           [{"name": f"user {i}", "last_name": "test", "email": f"user{i}@test.com",
+                             "password": "1234"} for i in range(users)])
+        db.session.execute(tables["favorites"].insert(),
+                           [{"user_id": i + 1} for i in range(users)])
+        db.session.execute(tables["fav_planets"].insert(),
+                           [{"fav_id": u + 1, "planet_id": p + 1} for u in range(users) for p in range(per_user)])
+        db.session.commit()
+
+
+def timed(label, func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:40} {elapsed * 1000:9.2f} ms/request  {rows} rows")
+
+
+def explain(statement):
+    compiled = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    if db.engine.dialect.name == "sqlite":
+        plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return "\n".join("    " + row[-1] for row in plan)
+    return "\n".join("    " + row[0] for row in db.session.execute(text(f"EXPLAIN {compiled}")).all())
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    seed(users, per_user)
+    print(f"{users * per_user} favorites ({users} users x {per_user})")
+
+    user_id = users // 2
+    unscoped = select(FavPlanet)
+    scoped = select(FavPlanet).join(FavPlanet.favorite).where(Favorite.user_id == user_id)
+
+    with app.app_context():
+        print("unscoped plan:\n" + explain(unscoped))
+        print("scoped plan:\n" + explain(scoped))
+
+        timed("unscoped select(FavPlanet)", lambda: len(db.session.execute(unscoped).scalars().all()), repeat=3)
+        db.session.expunge_all()
+
+        client = app.test_client()
+        url = f"/users/{user_id}/favorites/planets"
+        timed(f"GET {url}", lambda: len(client.get(url).json))
+        with count_queries() as queries:
+            client.get(url)
+        print(f"queries per request: {len(queries)}")
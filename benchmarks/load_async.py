@@ -0,0 +1,107 @@
+"""
+Load test of the read endpoints, sync gunicorn workers against the async (ASGI) mode.
+Both servers get the same number of worker processes and the same database.
+
+    $ python benchmarks/load_async.py [--clients 500] [--requests 5000] [--workers 2] [--path /planets/1]
+"""
+import os
+import time
+import asyncio
+import argparse
+import subprocess
+from common import app, db, reset_db, SRC
+
+SERVERS = {
+    "sync": ["gunicorn", "wsgi", "--chdir", SRC, "--bind", "127.0.0.1:{port}", "--workers", "{workers}",
+             "--log-level", "warning"],
+    "async": ["uvicorn", "asgi:application", "--app-dir", SRC, "--port", "{port}", "--workers", "{workers}",
+              "--log-level", "warning"],
+}
+
+
+def seed(rows):
+    reset_db()
+    with app.app_context():
+        db.session.execute(db.metadata.tables["planets"].insert(),
+                           [{"name_planet": f"planet {i}"} for i in range(rows)])
+        db.session.execute(db.metadata.tables["peoples"].insert(),
+                           [{"name_people": f"people {i}"} for i in range(rows)])
+        db.session.commit()
+
+
+async def fetch(port, path):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status = (await reader.readline()).split(b" ")[1]
+    await reader.read()
+    writer.close()
+    return status, time.perf_counter() - start
+
+
+async def load(port, path, clients, total):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(path)
+
+    async def client():
+        nonlocal errors
+        while not queue.empty():
+            url = queue.get_nowait()
+            try:
+                status, elapsed = await fetch(port, url)
+                latencies.append(elapsed)
+                errors += status != b"200"
+            except OSError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def wait_ready(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            await fetch(port, "/healthz")
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(mode, args, port):
+    command = [part.format(port=port, workers=args.workers) for part in SERVERS[mode]]
+    server = subprocess.Popen(command, env=os.environ)
+    try:
+        asyncio.run(wait_ready(port))
+        latencies, errors, elapsed = asyncio.run(load(port, args.path, args.clients, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{mode:6} {len(latencies) / elapsed:9.1f} req/s  p50 {percentile(latencies, 50) * 1000:8.1f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--path", default="/planets?limit=50")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.requests} x GET {args.path}, {args.clients} concurrent clients, {args.workers} workers")
+    for port, mode in enumerate(SERVERS, start=8701):
+        run(mode, args, port)
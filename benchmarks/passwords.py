@@ -0,0 +1,66 @@
+"""
+Signup throughput (POST /users) for several hashing methods / costs and hash pool
+sizes. Concurrent clients are threads sharing the app, like a gthread worker.
+Also reports the CPU time of one hash, which bounds the signups per second of a core.
+
+    $ python benchmarks/passwords.py [--clients 8] [--signups 40] [--pool thread|process]
+"""
+import time
+import argparse
+import threading
+from werkzeug.security import generate_password_hash
+from common import app, reset_db
+import passwords
+
+METHODS = ("pbkdf2:sha256:100000", "pbkdf2:sha256:600000", "scrypt:16384:8:1", "scrypt:32768:8:1")
+POOL_SIZES = (1, 2, 4)
+
+
+def cpu_per_hash(method, repeat=5):
+    start = time.process_time()
+    for _ in range(repeat):
+        generate_password_hash("benchmark password", method)
+    return (time.process_time() - start) / repeat
+
+
+def signups(clients, total, run_id):
+    client = app.test_client()
+    statuses = {}
+    lock = threading.Lock()
+
+    def sign_up(worker):
+        for n in range(worker, total, clients):
+            response = client.post("/users", json={
+                "name": "bench", "last_name": "bench", "email": f"{run_id}-{n}@bench.com", "password": "bench password"})
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=sign_up, args=(worker,)) for worker in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return total / (time.perf_counter() - start), statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--signups", type=int, default=40)
+    parser.add_argument("--pool", default="thread", choices=["thread", "process"])
+    args = parser.parse_args()
+
+    reset_db()
+    passwords.PASSWORD_HASH_POOL = args.pool
+    print(f"{args.clients} concurrent clients, {args.signups} signups per run, {args.pool} pool")
+
+    for method in METHODS:
+        print(f"\n{method}: {cpu_per_hash(method) * 1000:.1f} ms cpu per hash")
+        passwords.PASSWORD_HASH_METHOD = method
+        for size in POOL_SIZES:
+            passwords.PASSWORD_HASH_WORKERS = size
+            passwords.shutdown()
+            throughput, statuses = signups(args.clients, args.signups, f"{method}-{size}")
+            print(f"  pool {size}: {throughput:7.1f} signups/s  {statuses}")
+    passwords.shutdown()
@@ -0,0 +1,68 @@
+"""
+Memory per row and throughput of the planet list: full ORM entities against
+column projections (Row tuples) and __slots__ rows.
+
+    $ python benchmarks/projections.py [rows]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from sqlalchemy import select
+from common import app, db, reset_db
+from models import Planet
+from serializers import planet_columns, serialize_planets, PlanetRow
+
+
+def seed(n):
+    reset_db()
+    with app.app_context():
+        db.session.execute(db.metadata.tables["planets"].insert(),
+                           [{"name_planet": f"planet {i}"} for i in range(n)])
+        db.session.commit()
+
+
+LOADERS = {
+    "orm entity": lambda: db.session.execute(select(Planet)).scalars().all(),
+    "row tuple": lambda: db.session.execute(planet_columns()).all(),
+    "__slots__ row": lambda: [PlanetRow(*row) for row in db.session.execute(planet_columns())],
+}
+
+SERIALIZERS = {
+    "orm entity": lambda items: [item.serialize() for item in items],
+    "row tuple": serialize_planets,
+    "__slots__ row": lambda items: [item.serialize() for item in items],
+}
+
+
+def memory_per_row(load, rows):
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    items = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(items) == rows
+    return current / rows
+
+
+def throughput(load, serialize, rows, repeat=3):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        serialize(load())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seed(rows)
+    print(f"{rows} planets")
+    with app.app_context():
+        for name, load in LOADERS.items():
+            per_row = memory_per_row(load, rows)
+            speed = throughput(load, SERIALIZERS[name], rows)
+            print(f"{name:14} {per_row:8.0f} bytes/row  {speed:12,.0f} rows/s (load + serialize)")
@@ -0,0 +1,54 @@
+"""
+Checks that the number of queries per request stays the same as the data grows.
+User 1 has every planet and person in its favorite list, so the favorites requested
+grow with the data too, the other users have one of each.
+
+    $ python benchmarks/query_count.py
+"""
+from common import app, db, reset_db, count_queries
+from models import User, Favorite, Planet, People, FavPlanet, FavPeople
+
+ENDPOINTS = ["/users", "/users/1", "/users/1/favorites",
+             "/users/1/favorites/planets", "/users/1/favorites/peoples"]
+
+
+def seed(n):
+    reset_db()
+    with app.app_context():
+        planets = [Planet(name_planet=f"planet {i}") for i in range(n)]
+        peoples = [People(name_people=f"people {i}") for i in range(n)]
+        users = [User(name=f"user {i}", last_name="test", email=f"user{i}@test.com", password="1234")
+                 for i in range(n)]
+        db.session.add_all(planets + peoples + users)
+        db.session.flush()
+        favorites = [Favorite(user_id=user.id) for user in users]
+        db.session.add_all(favorites)
+        db.session.flush()
+        first = favorites[0]
+        db.session.add_all([FavPlanet(fav_id=first.id, planet_id=planet.id) for planet in planets])
+        db.session.add_all([FavPeople(fav_id=first.id, people_id=people.id) for people in peoples])
+        for fav, planet, people in zip(favorites[1:], planets[1:], peoples[1:]):
+            db.session.add_all([FavPlanet(fav_id=fav.id, planet_id=planet.id),
+                                FavPeople(fav_id=fav.id, people_id=people.id)])
+        db.session.commit()
+
+
+def measure(n):
+    seed(n)
+    client = app.test_client()
+    counts = {}
+    with app.app_context():
+        for url in ENDPOINTS:
+            with count_queries() as queries:
+                assert client.get(url).status_code == 200, url
+            counts[url] = len(queries)
+    return counts
+
+
+if __name__ == "__main__":
+    small, large = measure(5), measure(500)
+    for url in ENDPOINTS:
+        print(f"{url:35} {small[url]:>3} queries (5 rows)  {large[url]:>3} queries (500 rows)")
+    grows = [url for url in ENDPOINTS if small[url] != large[url]]
+    assert not grows, f"query count grows with the number of rows (N+1): {', '.join(grows)}"
+    print("OK: query count is constant")
@@ -0,0 +1,72 @@
+"""
+Name search at 1M rows: ?q= on /planets against downloading the whole table
+(the only option before), with the query plan of each search.
+Run it against Postgres (DATABASE_URL) to see the text_pattern_ops and trigram indexes used.
+
+    $ DATABASE_URL=postgresql://... python benchmarks/search.py [rows]
+"""
+import sys
+import time
+from sqlalchemy import text
+from common import app, db, reset_db
+from models import Planet
+from search import name_search
+import cache
+
+CHUNK = 50_000
+
+
+def seed(n):
+    reset_db()
+    with app.app_context():
+        planets = db.metadata.tables["planets"]
+        for start in range(0, n, CHUNK):
+            db.session.execute(planets.insert(),
+                               [{"name_planet": f"planet {i:07d}"} for i in range(start, min(n, start + CHUNK))])
+        # the search indexes are declared on the model, create_all() built them
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute(text("ANALYZE planets"))
+        db.session.commit()
+
+
+def explain(url):
+    with app.test_request_context(url):
+        statement = name_search(db.select(Planet.id, Planet.name_planet), Planet.name_planet)
+        compiled = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+        if db.engine.dialect.name == "sqlite":
+            rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+            return [row[-1] for row in rows]
+        return [row[0] for row in db.session.execute(text(f"EXPLAIN {compiled}")).all()]
+
+
+def timed(client, url, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = client.get(url).data
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    seed(rows)
+    with app.app_context():
+        print(f"{rows} planets on {db.engine.dialect.name}")
+
+    # measure the query, not the response cache
+    cache.CACHE_ENABLED = False
+    client = app.test_client()
+    needle = f"{rows // 2:07d}"
+    searches = [f"/planets?q=planet%20{needle}", f"/planets?q={needle}&match=contains"]
+
+    with app.app_context():
+        for url in searches:
+            elapsed, size = timed(client, url)
+            print(f"GET {url:40} {elapsed * 1000:9.1f} ms  {size:>12,} bytes")
+            for line in explain(url):
+                print(f"    {line}")
+
+        elapsed, size = timed(client, "/planets?stream=ndjson", repeat=1)
+        print(f"GET {'/planets?stream=ndjson (full download)':40} {elapsed * 1000:9.1f} ms  {size:>12,} bytes")
@@ -0,0 +1,63 @@
+"""
+Serialization of 100k planets: ORM objects + Model.serialize() + stdlib json
+(the previous path) against column rows + serialize_planets() + orjson.
+
+    $ python benchmarks/serialization.py [rows]
+"""
+import sys
+import time
+from sqlalchemy import select
+from flask.json.provider import DefaultJSONProvider
+from common import app, db, reset_db
+from models import Planet
+from serializers import planet_columns, serialize_planets
+from json_provider import OrjsonProvider, orjson
+
+
+def seed(n):
+    reset_db()
+    with app.app_context():
+        db.session.execute(db.metadata.tables["planets"].insert(),
+                           [{"name_planet": f"planet {i}"} for i in range(n)])
+        db.session.commit()
+
+
+def orm_rows():
+    return [planet.serialize() for planet in db.session.execute(select(Planet)).scalars().all()]
+
+
+def column_rows():
+    return serialize_planets(db.session.execute(planet_columns()).all())
+
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seed(rows)
+    print(f"{rows} planets, best of 5")
+
+    with app.app_context():
+        stdlib = DefaultJSONProvider(app)
+        fast = OrjsonProvider(app) if orjson else stdlib
+
+        load_orm, data = best_of(orm_rows)
+        load_columns, data = best_of(column_rows)
+        encode_stdlib, body = best_of(lambda: stdlib.dumps(data, separators=(",", ":")))
+        encode_fast, fast_body = best_of(lambda: fast.dumps(data))
+        assert body == fast_body, "JSON output differs"
+
+    before = load_orm + encode_stdlib
+    after = load_columns + encode_fast
+    print(f"load + serialize  ORM objects   {load_orm * 1000:8.1f} ms   column rows  {load_columns * 1000:8.1f} ms")
+    print(f"encode            stdlib json   {encode_stdlib * 1000:8.1f} ms   {'orjson' if orjson else 'stdlib':12} {encode_fast * 1000:8.1f} ms")
+    print(f"total             before        {before * 1000:8.1f} ms   after        {after * 1000:8.1f} ms   ({before / after:.1f}x)")
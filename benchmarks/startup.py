@@ -0,0 +1,64 @@
+"""
+Cold start of the full app against API_ONLY=1 (no admin, no sitemap): import time
+from `python -X importtime` and time from interpreter start to the first answered
+request, each in a fresh process.
+
+    $ python benchmarks/startup.py [runs]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+from common import SRC
+
+MODES = {"full": "0", "api only": "1"}
+
+FIRST_REQUEST = """
+from app import create_app
+app = create_app()
+response = app.test_client().get("/healthz")
+assert response.status_code == 200, response.status_code
+"""
+
+
+def run(code, api_only, importtime=False):
+    env = dict(os.environ, API_ONLY=api_only)
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def import_times(stderr):
+    # "import time: self [us] | cumulative | imported package", self time summed per top level package
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(own)
+    return packages
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if os.getenv("DATABASE_URL") is None:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "startup.db")
+
+    interpreter = statistics.median(run("pass", "0")[0] for _ in range(runs))
+    print(f"python -c pass: {interpreter * 1000:.0f} ms (median of {runs})\n")
+
+    for mode, api_only in MODES.items():
+        first_request = statistics.median(run(FIRST_REQUEST, api_only)[0] for _ in range(runs))
+        _, stderr = run("import wsgi", api_only, importtime=True)
+        packages = import_times(stderr)
+        slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:8]
+
+        print(f"{mode}: first request after {first_request * 1000:.0f} ms "
+              f"({(first_request - interpreter) * 1000:.0f} ms over the bare interpreter), "
+              f"imports {sum(packages.values()) / 1000:.0f} ms, flask_admin loaded: {'flask_admin' in packages}")
+        for name, microseconds in slowest:
+            print(f"    {name:20} {microseconds / 1000:7.1f} ms")
@@ -0,0 +1,67 @@
+"""
+Compares a full export of /planets built with jsonify([...]) against the
+streaming mode (?stream=ndjson and ?stream=json): peak memory and time to first byte.
+Each mode runs in its own process so peak RSS is not shared between them.
+
+    $ python benchmarks/streaming.py [rows]
+"""
+import os
+import sys
+import time
+import resource
+import subprocess
+import tracemalloc
+from common import app, db, reset_db
+
+MODES = ["jsonify", "ndjson", "json"]
+
+
+def seed(n):
+    reset_db()
+    with app.app_context():
+        db.session.execute(db.metadata.tables["planets"].insert(),
+                           [{"name_planet": f"planet {i}"} for i in range(n)])
+        db.session.commit()
+
+
+def run(mode):
+    from flask import jsonify
+    from sqlalchemy import select
+    from models import Planet
+
+    # the previous behaviour of GET /planets: whole table in one list and one JSON string
+    @app.route("/bench/jsonify-all")
+    def jsonify_all():
+        planets = db.session.execute(select(Planet)).scalars().all()
+        return jsonify([planet.serialize() for planet in planets]), 200
+
+    url = "/bench/jsonify-all" if mode == "jsonify" else f"/planets?stream={mode}"
+    client = app.test_client()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    ttfb = time.perf_counter() - start
+    size = len(first) + sum(len(chunk) for chunk in chunks)
+    total = time.perf_counter() - start
+    response.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:8} ttfb {ttfb * 1000:8.1f} ms  total {total * 1000:8.1f} ms  "
+          f"peak python {peak / 2**20:7.1f} MB  peak rss {rss:7.1f} MB  bytes {size}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run(sys.argv[2])
+        sys.exit(0)
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seed(rows)
+    print(f"{rows} planets")
+    for mode in MODES:
+        subprocess.run([sys.executable, __file__, "--mode", mode], check=True, env=os.environ)
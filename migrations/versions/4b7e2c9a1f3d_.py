@@ -0,0 +1,28 @@
+"""versions table for ETag counters
+
+Revision ID: 4b7e2c9a1f3d
+Revises: 19d6a03282a1
+Create Date: 2026-10-18 10:12:41.204519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c9a1f3d'
+down_revision = '19d6a03282a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('versions',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('versions')
@@ -0,0 +1,26 @@
+"""one favorite list per user
+
+Revision ID: 8e1d5a7c3b20
+Revises: 4b7e2c9a1f3d
+Create Date: 2026-10-18 11:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1d5a7c3b20'
+down_revision = '4b7e2c9a1f3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_favorites_user_id', ['user_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_favorites_user_id', type_='unique')
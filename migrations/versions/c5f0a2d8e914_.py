@@ -0,0 +1,34 @@
+"""indexes for per-user favorites lookups
+
+Revision ID: c5f0a2d8e914
+Revises: 8e1d5a7c3b20
+Create Date: 2026-10-18 11:48:05.730166
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f0a2d8e914'
+down_revision = '8e1d5a7c3b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # favorites.user_id is already indexed by uq_favorites_user_id (8e1d5a7c3b20)
+
+    # fav_people was created with people_id alone as primary key, so a person could
+    # only be in one favorite list. Use (fav_id, people_id) like the model and fav_planets.
+    with op.batch_alter_table('fav_people', schema=None, recreate='always') as batch_op:
+        if op.get_bind().dialect.name != 'sqlite':
+            batch_op.drop_constraint('fav_people_pkey', type_='primary')
+        batch_op.create_primary_key('fav_people_pkey', ['fav_id', 'people_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('fav_people', schema=None, recreate='always') as batch_op:
+        if op.get_bind().dialect.name != 'sqlite':
+            batch_op.drop_constraint('fav_people_pkey', type_='primary')
+        batch_op.create_primary_key('fav_people_pkey', ['people_id'])
@@ -0,0 +1,41 @@
+"""indexes for name search on planets and peoples
+
+Revision ID: e3a9c41b7d62
+Revises: c5f0a2d8e914
+Create Date: 2026-10-18 13:21:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c41b7d62'
+down_revision = 'c5f0a2d8e914'
+branch_labels = None
+depends_on = None
+
+# (table, column) searched with ?q= on the list endpoints, see src/search.py
+SEARCHED = [('planets', 'name_planet'), ('peoples', 'name_people')]
+
+
+def upgrade():
+    # text_pattern_ops and trigram indexes only exist on Postgres, SQLite searches without them
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column in SEARCHED:
+        op.create_index(f'ix_{table}_{column}_prefix', table,
+                        [sa.text(f'lower({column}) text_pattern_ops')])
+        op.create_index(f'ix_{table}_{column}_trgm', table, [column],
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column in SEARCHED:
+        op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+        op.drop_index(f'ix_{table}_{column}_prefix', table_name=table)
@@ -0,0 +1,42 @@
+"""favorites_count counters on planets and peoples
+
+Revision ID: f12b6d08a4c5
+Revises: e3a9c41b7d62
+Create Date: 2026-10-18 14:40:09.381277
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f12b6d08a4c5'
+down_revision = 'e3a9c41b7d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('planets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('favorites_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_planets_popularity', ['favorites_count', 'id'], unique=False)
+
+    with op.batch_alter_table('peoples', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('favorites_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_peoples_popularity', ['favorites_count', 'id'], unique=False)
+
+    # counters for the favorites that already exist
+    op.execute('UPDATE planets SET favorites_count = '
+               '(SELECT count(*) FROM fav_planets WHERE fav_planets.planet_id = planets.id)')
+    op.execute('UPDATE peoples SET favorites_count = '
+               '(SELECT count(*) FROM fav_people WHERE fav_people.people_id = peoples.id)')
+
+
+def downgrade():
+    with op.batch_alter_table('peoples', schema=None) as batch_op:
+        batch_op.drop_index('ix_peoples_popularity')
+        batch_op.drop_column('favorites_count')
+
+    with op.batch_alter_table('planets', schema=None) as batch_op:
+        batch_op.drop_index('ix_planets_popularity')
+        batch_op.drop_column('favorites_count')
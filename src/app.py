@@ -2,42 +2,70 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, request, jsonify, url_for
+from flask import Flask, Blueprint, request, jsonify, url_for, current_app
 from flask_migrate import Migrate
-from flask_swagger import swagger
 from flask_cors import CORS
 from utils import APIException, generate_sitemap
-from admin import setup_admin
-from sqlalchemy import select
+from config import database_config, pool_status
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
 from models import db, User, Favorite, Planet, People, FavPeople, FavPlanet
+from loaders import user_with_favorites, favorite_items, fav_planet_items, fav_people_items
+from pagination import paginate, page_response, MAX_PAGE_SIZE
+from streaming import stream_response
+from cache import cached, invalidate, get_backend
+from versions import etag, bump_version
+from bulk import bulk_create, bulk_response, favorites_diff
+from favorites import ensure_favorite, add_favorite, remove_favorites, apply_favorites_diff
+from serializers import user_columns, planet_columns, people_columns, serialize_users, serialize_planets, serialize_peoples
+from serializers import get_planet_row, get_people_row
+from search import name_search
+from autocomplete import autocomplete, planet_index, people_index
+from favorites import top_favorited
+from commands import setup_commands
+from instrumentation import setup_instrumentation
+from json_provider import setup_json
+from metrics import setup_metrics
+from compression import setup_compression
+from ratelimit import setup_rate_limits
+from passwords import hash_password, hash_passwords, verify_password, verify_unknown_user
 #from models import Person
 
-app = Flask(__name__)
-app.url_map.strict_slashes = False
+# API_ONLY=1 leaves out the admin and the sitemap: flask_admin is not even imported,
+# which makes worker boots and scripts like seed.py start faster
+API_ONLY = os.getenv("API_ONLY", "0") == "1"
 
-db_url = os.getenv("DATABASE_URL")
-if db_url is not None:
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_url.replace("postgres://", "postgresql://")
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-MIGRATE = Migrate(app, db)
-db.init_app(app)
-CORS(app)
-setup_admin(app)
+api = Blueprint("api", __name__)
 
 # Handle/serialize errors like a JSON object
-@app.errorhandler(APIException)
+@api.app_errorhandler(APIException)
 def handle_invalid_usage(error):
     return jsonify(error.to_dict()), error.status_code
 
-# generate sitemap with all your endpoints
-@app.route('/')
-def sitemap():
-    return generate_sitemap(app)
-
-# @app.route("/seed", methods=['GET'])
+# health check for the load balancer, fails if the database can not be reached
+@api.route('/healthz', methods=['GET'])
+def healthz():
+    try:
+        db.session.execute(text("SELECT 1"))
+    except Exception:
+        #the details (host, user...) go to the log only, this endpoint is public
+        current_app.logger.exception("health check: database unavailable")
+        db.session.rollback()
+        return jsonify({"status": "error", "database": "unavailable"}), 503
+
+    return jsonify({"status": "ok", "database": "ok"}), 200
+
+# connection pool usage of this worker, to tune workers against database capacity
+@api.route('/healthz/pool', methods=['GET'])
+def healthz_pool():
+    return jsonify(pool_status(db.engine)), 200
+
+# cache hit/miss/eviction counters, to size the cache
+@api.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_backend().stats()), 200
+
+# @api.route("/seed", methods=['GET'])
 # def seed():
 
     ## Uncomment and paste below this line the seed file content
@@ -46,23 +74,25 @@ def sitemap():
 
 #     return jsonify("All data added successfully"), 200
 
-# GET all users
-@app.route('/users', methods=['GET'])
+# GET all users (paginated with ?limit= and ?after=, or full export with ?stream=ndjson|json)
+@api.route('/users', methods=['GET'])
 def get_users():
 
-    statement = select(User)
-    # el scalars() se ocupa de devolverlos como objeto, sino seran devueltos como tuplas.
-    # como tupla NO pueden ejecutar el serialize
+    #only the needed columns, favorites are loaded for the whole page at once
+    statement = user_columns()
+
+    if "stream" in request.args:
+        return stream_response(statement.order_by(User.id), request.args["stream"], serialize_users)
 
-    users = db.session.execute(statement).scalars().all()
+    users, next_url = paginate(statement, User.id)
 
-    return jsonify([user.serialize() for user in users]), 200
+    return jsonify(page_response(users, next_url, serialize_users)), 200
 
 # GET only one user
-@app.route('/users/<int:user_id>', methods=['GET'])
+@api.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
 
-    statement = select(User).where(User.id == user_id)
+    statement = select(User).where(User.id == user_id).options(*user_with_favorites())
     user = db.session.execute(statement).scalar_one_or_none()
 
     if user is None:
@@ -71,58 +101,104 @@ def get_user(user_id):
     return jsonify(user.serialize()), 200
 
 # GET all favorite for specific user
-@app.route('/users/<int:user_id>/favorites', methods=['GET'])
+@api.route('/users/<int:user_id>/favorites', methods=['GET'])
+@etag("favorites:{user_id}")
 def get_favorite(user_id):
 
-    stmt_fav = select(Favorite).where(Favorite.user_id == user_id)
+    stmt_fav = select(Favorite).where(Favorite.user_id == user_id).options(*favorite_items())
     favs = db.session.execute(stmt_fav).scalars().all()
 
     return jsonify([fav.serialize() for fav in favs]), 200
 
-# GET all planets
-@app.route('/planets', methods=['GET'])
+# GET all planets (paginated with ?limit= and ?after=, or full export with ?stream=ndjson|json)
+# filtered by name with ?q= and ?match=prefix|contains
+@api.route('/planets', methods=['GET'])
+@etag("planets")
+@cached("planets:list:{version}:{query}")
 def get_planets():
 
-    statement = select(Planet)
-    planets = db.session.execute(statement).scalars().all()
+    statement = name_search(planet_columns(), Planet.name_planet)
+
+    if "stream" in request.args:
+        return stream_response(statement.order_by(Planet.id), request.args["stream"], serialize_planets)
 
-    return jsonify([planet.serialize() for planet in planets]), 200
+    planets, next_url = paginate(statement, Planet.id)
+
+    return jsonify(page_response(planets, next_url, serialize_planets)), 200
 
 # GET only one planet
-@app.route('/planets/<int:planet_id>', methods=['GET'])
+@api.route('/planets/<int:planet_id>', methods=['GET'])
+@etag("planets:{planet_id}")
+@cached("planets:{planet_id}:{version}")
 def get_planet(planet_id):
 
-    statement = select(Planet).where(Planet.id == planet_id)
-    planet = db.session.execute(statement).scalar_one_or_none()
+    planet = get_planet_row(planet_id)
 
     if planet is None:
         return jsonify({"error": "Planet not found"}), 404
 
     return jsonify(planet.serialize()), 200
 
-# GET all people
-@app.route('/peoples', methods=['GET'])
+# GET all people (paginated with ?limit= and ?after=, or full export with ?stream=ndjson|json)
+# filtered by name with ?q= and ?match=prefix|contains
+@api.route('/peoples', methods=['GET'])
+@etag("peoples")
+@cached("peoples:list:{version}:{query}")
 def get_all_peoples():
 
-    statement = select(People)
-    peoples = db.session.execute(statement).scalars().all()
+    statement = name_search(people_columns(), People.name_people)
+
+    if "stream" in request.args:
+        return stream_response(statement.order_by(People.id), request.args["stream"], serialize_peoples)
+
+    peoples, next_url = paginate(statement, People.id)
 
-    return jsonify([people.serialize() for people in peoples]), 200
+    return jsonify(page_response(peoples, next_url, serialize_peoples)), 200
 
 # GET only one people
-@app.route('/peoples/<int:people_id>', methods=['GET'])
+@api.route('/peoples/<int:people_id>', methods=['GET'])
+@etag("peoples:{people_id}")
+@cached("peoples:{people_id}:{version}")
 def get_person(people_id):
 
-    statement = select(People).where(People.id == people_id)
-    people = db.session.execute(statement).scalar_one_or_none()
+    people = get_people_row(people_id)
 
     if people is None:
         return jsonify({"error": "Person not found"}), 404
 
     return jsonify(people.serialize()), 200
 
+# Autocomplete planet names from an in-memory index, ?q=<prefix>&limit=
+@api.route('/autocomplete/planets', methods=['GET'])
+def autocomplete_planets():
+    return jsonify(autocomplete(planet_index, request.args)), 200
+
+# Autocomplete people names from an in-memory index, ?q=<prefix>&limit=
+@api.route('/autocomplete/peoples', methods=['GET'])
+def autocomplete_peoples():
+    return jsonify(autocomplete(people_index, request.args)), 200
+
+# Most favorited planets, ?limit= (10 by default)
+@api.route('/planets/top', methods=['GET'])
+def top_planets():
+
+    limit = min(request.args.get("limit", 10, type=int) or 10, MAX_PAGE_SIZE)
+    planets = top_favorited(Planet, max(limit, 1))
+
+    return jsonify([{**planet.serialize(), "favorites": planet.favorites_count} for planet in planets]), 200
+
+# Most favorited people, ?limit= (10 by default)
+@api.route('/peoples/top', methods=['GET'])
+def top_peoples():
+
+    limit = min(request.args.get("limit", 10, type=int) or 10, MAX_PAGE_SIZE)
+    peoples = top_favorited(People, max(limit, 1))
+
+    return jsonify([{**people.serialize(), "favorites": people.favorites_count} for people in peoples]), 200
+
 # GET all favorite planets of user
-@app.route('/users/<int:user_id>/favorites/planets', methods=['GET'])
+@api.route('/users/<int:user_id>/favorites/planets', methods=['GET'])
+@etag("favorites:{user_id}")
 def get_fav_planets(user_id):
 
     statement = select(User).where(User.id == user_id)
@@ -131,7 +207,13 @@ def get_fav_planets(user_id):
     if user is None:
         return jsonify({"error": "User not found"}), 404
 
-    statement = select(FavPlanet)
+    #only the favorites of this user, found through favorites.user_id
+    statement = (
+        select(FavPlanet)
+        .join(FavPlanet.favorite)
+        .where(Favorite.user_id == user_id)
+        .options(*fav_planet_items())
+    )
     fav = db.session.execute(statement).scalars().all()
 
     if fav is None:
@@ -140,7 +222,8 @@ def get_fav_planets(user_id):
     return jsonify([f.serialize() for f in fav]), 200
 
 # GET all favorite people of user
-@app.route('/users/<int:user_id>/favorites/peoples', methods=['GET'])
+@api.route('/users/<int:user_id>/favorites/peoples', methods=['GET'])
+@etag("favorites:{user_id}")
 def get_fav_peoples(user_id):
 
     statement = select(User).where(User.id == user_id)
@@ -149,7 +232,13 @@ def get_fav_peoples(user_id):
     if user is None:
         return jsonify({"error": "User not found"}), 404
     
-    statement = select(FavPeople)
+    #only the favorites of this user, found through favorites.user_id
+    statement = (
+        select(FavPeople)
+        .join(FavPeople.favorite)
+        .where(Favorite.user_id == user_id)
+        .options(*fav_people_items())
+    )
     fav = db.session.execute(statement).scalars().all()
 
     if fav is None:
@@ -158,19 +247,22 @@ def get_fav_peoples(user_id):
     return jsonify([f.serialize() for f in fav]), 200
 
 # Create user account
-@app.route("/users", methods=["POST"])
+@api.route("/users", methods=["POST"])
 def create_user():
 
     data = request.get_json()
 
-    if not data or "email" not in data or "password" not in data or "name" not in data or "last_name" not in data:
+    if not isinstance(data, dict) or "email" not in data or "password" not in data or "name" not in data or "last_name" not in data:
         return jsonify({"error": "Missing data"}), 400
+
+    if not all(isinstance(data[field], str) for field in ("email", "password", "name", "last_name")):
+        return jsonify({"error": "Invalid data, fields must be strings"}), 400
     
     new_user = User(
         name=data["name"],
         last_name=data["last_name"],
         email=data["email"],
-        password=data["password"],
+        password=hash_password(data["password"]),
     )
 
     db.session.add(new_user)
@@ -178,8 +270,35 @@ def create_user():
 
     return jsonify(new_user.serialize()), 201
 
+# Check a user's password, the stored hash is upgraded when the hashing settings changed
+@api.route("/login", methods=["POST"])
+def login():
+
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict) or "email" not in data or "password" not in data:
+        return jsonify({"error": "Missing data"}), 400
+
+    if not isinstance(data["email"], str) or not isinstance(data["password"], str):
+        return jsonify({"error": "Invalid data, fields must be strings"}), 400
+
+    user = db.session.execute(select(User).where(User.email == data["email"])).scalar_one_or_none()
+    if user is None:
+        matches, new_hash = verify_unknown_user(data["password"])
+    else:
+        matches, new_hash = verify_password(user.password, data["password"])
+
+    if not matches:
+        return jsonify({"error": "Invalid email or password"}), 401
+
+    if new_hash is not None:
+        user.password = new_hash
+        db.session.commit()
+
+    return jsonify({"message": "Logged in", "id": user.id}), 200
+
 # Create planet
-@app.route("/planets", methods=["POST"])
+@api.route("/planets", methods=["POST"])
 def create_planet():
 
     data = request.get_json()
@@ -191,12 +310,15 @@ def create_planet():
         name_planet=data["name_planet"]
     )
     db.session.add(new_planet)
+    bump_version("planets")
     db.session.commit()
+    invalidate(prefix="planets:list:")
+    planet_index.add(new_planet.id, new_planet.name_planet)
 
     return jsonify(new_planet.serialize()), 201
 
 # Create people
-@app.route("/peoples", methods=["POST"])
+@api.route("/peoples", methods=["POST"])
 def create_people():
 
     data = request.get_json()
@@ -208,80 +330,154 @@ def create_people():
         name_people=data["name_people"]
     )
     db.session.add(new_people)
+    bump_version("peoples")
     db.session.commit()
+    invalidate(prefix="peoples:list:")
+    people_index.add(new_people.id, new_people.name_people)
 
     return jsonify(new_people.serialize()), 201
 
+def hash_user_passwords(rows):
+    for row, hashed in zip(rows, hash_passwords([row["password"] for row in rows])):
+        row["password"] = hashed
+
+# Create many users at once (JSON array), conflicts on email are reported per item
+@api.route("/users/bulk", methods=["POST"])
+def create_users_bulk():
+
+    users, conflicts = bulk_create(User, ["name", "last_name", "email", "password"], unique="email", prepare=hash_user_passwords)
+    # serialized before the commit expires the new objects
+    response = bulk_response(users, conflicts)
+    db.session.commit()
+
+    return jsonify(response), 201
+
+# Create many planets at once (JSON array), conflicts on name_planet are reported per item
+@api.route("/planets/bulk", methods=["POST"])
+def create_planets_bulk():
+
+    planets, conflicts = bulk_create(Planet, ["name_planet"], unique="name_planet")
+    if planets:
+        bump_version("planets")
+    response = bulk_response(planets, conflicts)
+    db.session.commit()
+    invalidate(prefix="planets:list:")
+    for planet in response["created"]:
+        planet_index.add(planet["id"], planet["name"])
+
+    return jsonify(response), 201
+
+# Create many people at once (JSON array), conflicts on name_people are reported per item
+@api.route("/peoples/bulk", methods=["POST"])
+def create_peoples_bulk():
+
+    peoples, conflicts = bulk_create(People, ["name_people"], unique="name_people")
+    if peoples:
+        bump_version("peoples")
+    response = bulk_response(peoples, conflicts)
+    db.session.commit()
+    invalidate(prefix="peoples:list:")
+    for people in response["created"]:
+        people_index.add(people["id"], people["name_people"])
+
+    return jsonify(response), 201
+
 # Add planet to favorite list
-@app.route("/users/<int:user_id>/favorites/planets/<int:planet_id>", methods=["POST"])
+@api.route("/users/<int:user_id>/favorites/planets/<int:planet_id>", methods=["POST"])
 def add_fav_planet(user_id, planet_id):
 
-    stmt_fav = select(Favorite).where(Favorite.user_id == user_id)
-    fav = db.session.execute(stmt_fav).scalar_one_or_none()
-
-    #We check if fav list was created otherwise we have to create a new one before adding planet to list
-    if fav is None:
-        fav = Favorite(user_id=user_id)
-        db.session.add(fav)
-        db.session.commit()
+    #The fav list is created if needed, on its own so a missing user is told apart
+    try:
+        ensure_favorite(user_id)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "User not found"}), 404
 
-    #If fav list exists, we check if already exists has the planet we want to add
-    stmt_planet = select(FavPlanet).where(
-        FavPlanet.fav_id == fav.id,
-        FavPlanet.planet_id == planet_id
-        )
-    fav_planet = db.session.execute(stmt_planet).scalar_one_or_none()
+    #The planet is added only if it exists and is not already there: INSERT ... SELECT FROM planets
+    try:
+        added = add_favorite(FavPlanet, "planet_id", planet_id, user_id)
+    except IntegrityError:
+        #deleted by a concurrent request
+        db.session.rollback()
+        return jsonify({"error": "Planet not found"}), 404
 
-    #If found on the fav list, it returns an error
-    if fav_planet is not None:
+    #Nothing inserted: the planet does not exist or is already on the fav list
+    if added is None:
+        db.session.rollback()
+        if get_planet_row(planet_id) is None:
+            return jsonify({"error": "Planet not found"}), 404
         return jsonify({"error": "Planet already added to list"}), 404
-    
-    #If not found on the fav list we add it
-    new_fav_planet = FavPlanet(
-        fav_id=fav.id,
-        planet_id=planet_id
-    )
-    db.session.add(new_fav_planet)
+
+    fav_id, name = added
+    response = {
+        "fav_id": fav_id,
+        "planet_id": planet_id,
+        "planet_name": name
+    }
+    bump_version(f"favorites:{user_id}")
     db.session.commit()
 
-    return jsonify(new_fav_planet.serialize()), 201
+    return jsonify(response), 201
 
 # Add people to favorite list
-@app.route("/users/<int:user_id>/favorites/peoples/<int:people_id>", methods=["POST"])
+@api.route("/users/<int:user_id>/favorites/peoples/<int:people_id>", methods=["POST"])
 def add_fav_people(user_id, people_id):
 
-    stmt_fav = select(Favorite).where(Favorite.user_id == user_id)
-    fav = db.session.execute(stmt_fav).scalar_one_or_none()
-
-    #We check if fav list was created otherwise we have to create a new one before adding people to list
-    if fav is None:
-        fav = Favorite(user_id=user_id)
-        db.session.add(fav)
-        db.session.commit()
+    #The fav list is created if needed, on its own so a missing user is told apart
+    try:
+        ensure_favorite(user_id)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "User not found"}), 404
 
-    #If fav list exists, we check if already exists has the people we want to add
-    stmt_people = select(FavPeople).where(
-        FavPeople.fav_id == fav.id,
-        FavPeople.people_id == people_id
-        )
-    fav_people = db.session.execute(stmt_people).scalar_one_or_none()
+    #The person is added only if it exists and is not already there: INSERT ... SELECT FROM peoples
+    try:
+        added = add_favorite(FavPeople, "people_id", people_id, user_id)
+    except IntegrityError:
+        #deleted by a concurrent request
+        db.session.rollback()
+        return jsonify({"error": "Person not found"}), 404
 
-    #If found on the fav list, it returns an error
-    if fav_people is not None:
+    #Nothing inserted: the person does not exist or is already on the fav list
+    if added is None:
+        db.session.rollback()
+        if get_people_row(people_id) is None:
+            return jsonify({"error": "Person not found"}), 404
         return jsonify({"error": "Person already added to list"}), 404
-    
-    #If not found on the fav list we add it
-    new_fav_people = FavPeople(
-        fav_id=fav.id,
-        people_id=people_id
-    )
-    db.session.add(new_fav_people)
+
+    fav_id, name = added
+    response = {
+        "fav_id": fav_id,
+        "people_id": people_id,
+        "people_name": name
+    }
+    bump_version(f"favorites:{user_id}")
     db.session.commit()
 
-    return jsonify(new_fav_people.serialize()), 201
+    return jsonify(response), 201
+
+# Add and remove many planets and people of the favorite list at once
+@api.route("/users/<int:user_id>/favorites", methods=["PATCH"])
+def update_favorites(user_id):
+
+    diff = favorites_diff()
+
+    try:
+        apply_favorites_diff(user_id, diff)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "User not found"}), 404
+
+    bump_version(f"favorites:{user_id}")
+    db.session.commit()
+
+    stmt_fav = select(Favorite).where(Favorite.user_id == user_id).options(*favorite_items())
+    favs = db.session.execute(stmt_fav).scalars().all()
+
+    return jsonify([fav.serialize() for fav in favs]), 200
 
 # delete one user
-@app.route("/users/<int:id>", methods=["DELETE"])
+@api.route("/users/<int:id>", methods=["DELETE"])
 def delete_user(id):
 
     stmt = select(User).where(User.id == id)
@@ -291,12 +487,13 @@ def delete_user(id):
         return jsonify({"error": "User not found"}), 404
     
     db.session.delete(user)
+    bump_version(f"favorites:{id}")
     db.session.commit()
 
     return jsonify({"message": "User deleted"}), 200
 
 # delete one planet
-@app.route("/planets/<int:id>", methods=["DELETE"])
+@api.route("/planets/<int:id>", methods=["DELETE"])
 def delete_planet(id):
 
     stmt = select(Planet).where(Planet.id == id)
@@ -306,12 +503,18 @@ def delete_planet(id):
         return jsonify({"error": "Planet not found"}), 404
     
     db.session.delete(planet)
+    #the lists and this planet only, the other planets keep their cached bodies and ETags
+    bump_version("planets")
+    bump_version(f"planets:{id}")
     db.session.commit()
+    invalidate(prefix="planets:list:")
+    invalidate(prefix=f"planets:{id}:")
+    planet_index.remove(id)
 
     return jsonify({"message": "Planet deleted"}), 200
 
 # delete one people
-@app.route("/peoples/<int:id>", methods=["DELETE"])
+@api.route("/peoples/<int:id>", methods=["DELETE"])
 def delete_people(id):
 
     stmt = select(People).where(People.id == id)
@@ -321,48 +524,83 @@ def delete_people(id):
         return jsonify({"error": "Person not found"}), 404
     
     db.session.delete(people)
+    #the lists and this person only, the other people keep their cached bodies and ETags
+    bump_version("peoples")
+    bump_version(f"peoples:{id}")
     db.session.commit()
+    invalidate(prefix="peoples:list:")
+    invalidate(prefix=f"peoples:{id}:")
+    people_index.remove(id)
 
     return jsonify({"message": "Person deleted"}), 200
 
 # delete one fav planet of user list
-@app.route("/users/<int:user_id>/favorites/planets/<int:planet_id>", methods=["DELETE"])
+@api.route("/users/<int:user_id>/favorites/planets/<int:planet_id>", methods=["DELETE"])
 def delete_fav_planet(user_id, planet_id):
 
-    stmt = select(FavPlanet).where(
-        FavPlanet.fav_id == user_id,
-        FavPlanet.planet_id == planet_id
-        )
-    fav = db.session.execute(stmt).scalar_one_or_none()
+    #fav_id is the id of the user's favorite list, not the user id
+    removed = remove_favorites(FavPlanet, "planet_id", [planet_id], user_id)
 
-    if fav is None:
+    if not removed:
+        db.session.rollback()
         return jsonify({"error": "Planet not in list"}), 404
     
-    db.session.delete(fav)
+    bump_version(f"favorites:{user_id}")
     db.session.commit()
 
     return jsonify({"message": "Planet deleted from list"}), 200
 
 # delete one fav people of user list
-@app.route("/users/<int:user_id>/favorites/peoples/<int:people_id>", methods=["DELETE"])
+@api.route("/users/<int:user_id>/favorites/peoples/<int:people_id>", methods=["DELETE"])
 def delete_fav_people(user_id, people_id):
 
-    #This time we se fav_id as now it is associated to the favorites.id after added with POST method
-    stmt = select(FavPeople).where(
-        FavPeople.fav_id == user_id,
-        FavPeople.people_id == people_id
-        )
-    fav = db.session.execute(stmt).scalar_one_or_none()
+    #fav_id is the id of the user's favorite list, not the user id
+    removed = remove_favorites(FavPeople, "people_id", [people_id], user_id)
 
-    if fav is None:
+    if not removed:
+        db.session.rollback()
         return jsonify({"error": "Person not in list"}), 404
     
-    db.session.delete(fav)
+    bump_version(f"favorites:{user_id}")
     db.session.commit()
 
     return jsonify({"message": "Person deleted from list"}), 200
 
+def create_app(api_only=None):
+    if api_only is None:
+        api_only = API_ONLY
+
+    app = Flask(__name__)
+    app.url_map.strict_slashes = False
+    setup_json(app)
+
+    # database url and connection pool settings, see config.py
+    app.config.update(database_config())
+
+    Migrate(app, db)
+    db.init_app(app)
+    # settings from the CORS_* config keys, asgi.py applies the same ones to its GETs
+    CORS(app)
+    app.register_blueprint(api)
+    setup_commands(app)
+    setup_instrumentation(app)
+    setup_metrics(app, db)
+    setup_rate_limits(app)
+    setup_compression(app)
+
+    if not api_only:
+        # imported here so API only deployments never load flask_admin
+        from admin import setup_admin
+        setup_admin(app)
+
+        # generate sitemap with all your endpoints
+        @app.route('/')
+        def sitemap():
+            return generate_sitemap(app)
+
+    return app
+
 # this only runs if `$ python src/app.py` is executed
 if __name__ == '__main__':
     PORT = int(os.environ.get('PORT', 3000))
-    app.run(host='0.0.0.0', port=PORT, debug=False)
+    create_app().run(host='0.0.0.0', port=PORT, debug=False)
@@ -0,0 +1,236 @@
+"""
+Optional async serving mode. The read-only GET endpoints are answered by async
+handlers on SQLAlchemy's asyncio engine (asyncpg / aiosqlite), so a slow query does
+not hold a whole worker. Every other request is passed to the Flask app.
+
+    $ gunicorn asgi:application --chdir ./src/ -k uvicorn.workers.UvicornWorker
+    $ GUNICORN_WORKER_CLASS=uvicorn gunicorn --chdir ./src/ -c ./src/gunicorn.conf.py
+"""
+import re
+import time
+from urllib.parse import parse_qsl, urlencode, unquote_plus
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+from flask_cors.core import get_cors_options, get_cors_headers, parse_resources, try_match
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app import create_app
+from utils import APIException
+from config import database_url, engine_options
+from models import User, Planet, People
+from pagination import page_args, page_statement, encode_cursor
+from serializers import user_columns, planet_columns, people_columns, serialize_planets, serialize_peoples
+from serializers import favorites_statements, build_favorites, user_dicts
+from versions import make_etag, version_statement, version_from
+from cache import CACHE_ENABLED, get_backend
+from compression import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, choose_encoding, compress, cached_variant
+from compression import etag_variants
+import metrics
+from instrumentation import SQL_INSTRUMENTATION, RequestQueries, async_queries, report
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url):
+    dialect, rest = url.split(":", 1)
+    return ASYNC_DRIVERS.get(dialect.split("+", 1)[0], dialect) + ":" + rest
+
+def async_engine_options(url):
+    # same settings as the sync engine, the asyncio engine picks its own pool class
+    options = engine_options(url)
+    options.pop("poolclass", None)
+    return options
+
+engine = create_async_engine(async_database_url(database_url()), **async_engine_options(database_url()))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# The same column selects and serializers as the Flask views (serializers.py), so both
+# paths produce the same bodies for the same cache keys and ETags.
+
+async def serialize_user_rows(session, rows):
+    ids = [row.id for row in rows]
+    favorites = {}
+    if ids:
+        favorites = build_favorites(*[(await session.execute(statement)).all() for statement in favorites_statements(ids)])
+    return user_dicts(rows, favorites)
+
+async def serialize_planet_rows(session, rows):
+    return serialize_planets(rows)
+
+async def serialize_people_rows(session, rows):
+    return serialize_peoples(rows)
+
+# path -> (columns, key, serialize, not found message, version key, cache key), "{id}" is the detail form
+ROUTES = [
+    (re.compile(r"^/users/?$"), user_columns, User.id, serialize_user_rows, "User not found", None, None),
+    (re.compile(r"^/users/(\d+)/?$"), user_columns, User.id, serialize_user_rows, "User not found", None, None),
+    (re.compile(r"^/planets/?$"), planet_columns, Planet.id, serialize_planet_rows, "Planet not found",
+     "planets", "planets:list:{version}:{query}"),
+    (re.compile(r"^/planets/(\d+)/?$"), planet_columns, Planet.id, serialize_planet_rows, "Planet not found",
+     "planets:{id}", "planets:{id}:{version}"),
+    (re.compile(r"^/peoples/?$"), people_columns, People.id, serialize_people_rows, "Person not found",
+     "peoples", "peoples:list:{version}:{query}"),
+    (re.compile(r"^/peoples/(\d+)/?$"), people_columns, People.id, serialize_people_rows, "Person not found",
+     "peoples:{id}", "peoples:{id}:{version}"),
+]
+
+def dumps(flask_app, data):
+    # the Flask app's JSON provider (orjson when installed), same bytes as jsonify
+    return flask_app.json.response(data).get_data()
+
+async def list_items(session, columns, key, serialize, path, args):
+    limit, after = page_args(args)
+    items = (await session.execute(page_statement(columns(), key, limit, after))).all()
+
+    next_url = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_url = path + "?" + urlencode({**args, "limit": limit, "after": encode_cursor(items[-1].id)})
+
+    return 200, {"results": await serialize(session, items), "next": next_url}
+
+async def get_item(session, columns, key, serialize, not_found, item_id):
+    row = (await session.execute(columns().where(key == item_id))).first()
+
+    if row is None:
+        return 404, {"error": not_found}
+    return 200, (await serialize(session, [row]))[0]
+
+def encode(body, headers, scope, key):
+    # same negotiation as compression.setup_compression
+    if not COMPRESSION_ENABLED:
+        return body
+    headers["vary"] = "Accept-Encoding"
+    encoding = choose_encoding(dict(scope["headers"]).get(b"accept-encoding", b"").decode())
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return body
+    if key is not None:
+        body = cached_variant(get_backend(), key, body, encoding)
+    else:
+        body = compress(body, encoding)
+    headers["content-encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = headers["etag"][:-1] + "-" + encoding + '"'
+    return body
+
+async def handle(flask_app, scope, match, columns, key_column, serialize, not_found, version_key, cache_key):
+    query = scope["query_string"].decode()
+    args = dict(parse_qsl(query))
+    item_id = match.group(1) if match.groups() else None
+    headers = {}
+
+    async with Session() as session:
+        if version_key is not None:
+            version_key = version_key.format(id=item_id)
+            version = version_from((await session.execute(version_statement(version_key))).all(), version_key)
+            headers["etag"] = '"' + make_etag(version_key, version, query) + '"'
+            if_none_match = [tag.strip() for tag in dict(scope["headers"]).get(b"if-none-match", b"").decode().split(",")]
+            for variant in etag_variants(headers["etag"][1:-1]):
+                if f'"{variant}"' in if_none_match:
+                    return 304, b"", {"etag": f'"{variant}"'}
+
+        key = None
+        if CACHE_ENABLED and cache_key is not None:
+            key = cache_key.format(query=query, version=version, id=item_id)
+            body = get_backend().get(key)
+            if body is not None:
+                return 200, encode(body, headers, scope, key), headers
+
+        try:
+            if item_id is not None:
+                status, data = await get_item(session, columns, key_column, serialize, not_found, int(item_id))
+            else:
+                status, data = await list_items(session, columns, key_column, serialize, scope["path"], args)
+        except APIException as error:
+            status, data = error.status_code, error.to_dict()
+
+    body = dumps(flask_app, data)
+    if status != 200:
+        # like the Flask views, only successful responses get an ETag
+        return status, body, {}
+    if key is not None:
+        get_backend().set(key, body)
+    return status, encode(body, headers, scope, key), headers
+
+def cors_resources(flask_app):
+    # CORS(app) in create_app has no arguments: its settings are the CORS_* config keys
+    options = get_cors_options(flask_app)
+    return [(pattern, get_cors_options(flask_app, options, resource_options))
+            for pattern, resource_options in parse_resources(options.get("resources"))]
+
+def cors_headers(resources, path, request_headers):
+    # what flask_cors adds to the Flask responses in after_request
+    for pattern, options in resources:
+        if try_match(unquote_plus(path), pattern):
+            return list(get_cors_headers(options, request_headers, "GET").items(multi=True))
+    return []
+
+async def send_response(send, status, body, headers):
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(name.encode(), value.encode()) for name, value in headers]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+class AsyncReadApp:
+    def __init__(self, wsgi_app):
+        self.flask_app = wsgi_app
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.cors = cors_resources(wsgi_app)
+        self.url_adapter = wsgi_app.url_map.bind("localhost")
+
+    def match(self, scope):
+        # exports and name searches are left to the Flask views
+        args = dict(parse_qsl(scope["query_string"].decode()))
+        if scope["method"] != "GET" or "stream" in args or "q" in args:
+            return None
+        for pattern, *route in ROUTES:
+            match = pattern.match(scope["path"])
+            if match:
+                return match, route
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await engine.dispose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        matched = self.match(scope) if scope["type"] == "http" else None
+        if matched is None:
+            return await self.fallback(scope, receive, send)
+
+        match, route = matched
+        start = time.perf_counter()
+        # the Flask rule, so the metrics and logs use the same route and endpoint names
+        rule, _ = self.url_adapter.match(scope["path"], method="GET", return_rule=True)
+        request_headers = Headers([(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]])
+
+        queries = None
+        if SQL_INSTRUMENTATION:
+            queries = RequestQueries()
+            async_queries.set(queries)
+        if metrics.metrics_enabled():
+            metrics.IN_PROGRESS.inc()
+        try:
+            status, body, headers = await handle(self.flask_app, scope, match, *route)
+        finally:
+            if metrics.metrics_enabled():
+                metrics.IN_PROGRESS.dec()
+
+        # the headers and records the Flask hooks add to the other responses
+        headers = list(headers.items()) + cors_headers(self.cors, scope["path"], request_headers)
+        if queries is not None:
+            path = scope["path"] + ("?" + scope["query_string"].decode() if scope["query_string"] else "")
+            headers += [("server-timing", timing) for timing in report(queries, "GET", path, rule.endpoint, status)]
+        if metrics.metrics_enabled():
+            metrics.observe_request("GET", rule.rule, status, time.perf_counter() - start)
+
+        await send_response(send, status, body, headers)
+
+application = AsyncReadApp(create_app())
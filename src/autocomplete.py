@@ -0,0 +1,127 @@
+import os
+import time
+import threading
+from bisect import bisect_left, insort
+from flask import current_app
+from utils import APIException
+from models import db, Planet, People
+from serializers import PlanetRow, PeopleRow
+
+AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", 10))
+AUTOCOMPLETE_MAX_LIMIT = int(os.getenv("AUTOCOMPLETE_MAX_LIMIT", 50))
+# writes made by other workers are picked up when the index is rebuilt
+AUTOCOMPLETE_REFRESH = int(os.getenv("AUTOCOMPLETE_REFRESH", 300))
+
+class PrefixIndex:
+    """
+    Names kept in memory as a sorted list of (lowercase name, id), so completing a
+    prefix is a bisect plus a short scan. Built from the database on first use and
+    updated by the write endpoints of this worker. Refreshes run in a background
+    thread, one at a time, and requests keep using the old index meanwhile.
+    """
+
+    def __init__(self, model, name_column, row_class):
+        self.model = model
+        self.name_column = name_column
+        self.row_class = row_class
+        self.keys = []
+        self.rows = {}
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.built_at = None
+        # writes of this worker made while a rebuild reads the table, replayed on the new index
+        self.pending = None
+
+    def build(self):
+        with self.lock:
+            self.pending = []
+        try:
+            statement = db.select(self.model.id, self.name_column)
+            rows = {id: self.row_class(id, name) for id, name in db.session.execute(statement)}
+            keys = sorted((self.key(row), id) for id, row in rows.items())
+        except Exception:
+            with self.lock:
+                self.pending = None
+            raise
+        with self.lock:
+            pending, self.pending = self.pending, None
+            self.rows = rows
+            self.keys = keys
+            self.built_at = time.monotonic()
+            for change, args in pending:
+                change(*args)
+
+    def refresh(self, app):
+        try:
+            with app.app_context():
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def ensure_built(self):
+        if self.built_at is None:
+            # first use: the requests wait for one build
+            with self.build_lock:
+                if self.built_at is None:
+                    self.build()
+        elif time.monotonic() - self.built_at > AUTOCOMPLETE_REFRESH and self.build_lock.acquire(blocking=False):
+            # released by refresh() once the new index is in place
+            app = current_app._get_current_object()
+            threading.Thread(target=self.refresh, args=(app,), daemon=True).start()
+
+    def key(self, row):
+        return getattr(row, self.name_column.key).lower()
+
+    def add(self, id, name):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((self.insert, (id, name)))
+            if self.built_at is not None:
+                self.insert(id, name)
+
+    def insert(self, id, name):
+        # with self.lock held
+        if id in self.rows:
+            return
+        row = self.row_class(id, name)
+        self.rows[id] = row
+        insort(self.keys, (self.key(row), id))
+
+    def remove(self, id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((self.delete, (id,)))
+            self.delete(id)
+
+    def delete(self, id):
+        # with self.lock held
+        row = self.rows.pop(id, None)
+        if row is None:
+            return
+        position = bisect_left(self.keys, (self.key(row), id))
+        del self.keys[position]
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = prefix.lower()
+        results = []
+        with self.lock:
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                name, id = self.keys[position]
+                if not name.startswith(prefix):
+                    break
+                results.append(self.rows[id])
+                position += 1
+        return results
+
+planet_index = PrefixIndex(Planet, Planet.name_planet, PlanetRow)
+people_index = PrefixIndex(People, People.name_people, PeopleRow)
+
+def autocomplete(index, args):
+    limit = args.get("limit", AUTOCOMPLETE_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise APIException("limit must be a positive integer", status_code=400)
+    limit = min(limit, AUTOCOMPLETE_MAX_LIMIT)
+
+    index.ensure_built()
+    return [row.serialize() for row in index.complete(args.get("q", ""), limit)]
@@ -0,0 +1,91 @@
+import os
+from flask import request
+from sqlalchemy.orm.attributes import set_committed_value
+from utils import APIException
+from models import db, User
+from upsert import insert_ignore
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
+
+def bulk_items(fields):
+    """Reads and validates the JSON array of the request before anything is written."""
+    items = request.get_json(silent=True)
+
+    if not isinstance(items, list) or not items:
+        raise APIException("Expected a non empty JSON array", status_code=400)
+    if len(items) > BULK_MAX_ITEMS:
+        raise APIException(f"Too many items, the maximum is {BULK_MAX_ITEMS}", status_code=400)
+
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or any(field not in item for field in fields):
+            errors.append({"index": index, "error": "Missing data"})
+        elif not all(isinstance(item[field], str) for field in fields):
+            errors.append({"index": index, "error": "Fields must be strings"})
+    if errors:
+        raise APIException("Invalid items, nothing was created", status_code=400, payload={"errors": errors})
+
+    return [{field: item[field] for field in fields} for item in items]
+
+def bulk_create(model, fields, unique, prepare=None):
+    """
+    Inserts all the rows in one multi-row INSERT and one transaction. Rows that collide
+    with the unique column (already in the table or repeated in the request) are
+    skipped and reported as conflicts. prepare(rows) can change the rows to insert
+    (e.g. hash the passwords) after validation.
+    """
+    rows = bulk_items(fields)
+
+    conflicts = []
+    seen = set()
+    to_insert = []
+    for index, row in enumerate(rows):
+        if row[unique] in seen:
+            conflicts.append({"index": index, unique: row[unique], "error": "Duplicated in request"})
+            continue
+        seen.add(row[unique])
+        to_insert.append((index, row))
+
+    if prepare is not None:
+        prepare([row for _, row in to_insert])
+
+    statement = insert_ignore(model).returning(model)
+    created = db.session.scalars(statement, [row for _, row in to_insert]).all()
+
+    inserted = {getattr(obj, unique) for obj in created}
+    for index, row in to_insert:
+        if row[unique] not in inserted:
+            conflicts.append({"index": index, unique: row[unique], "error": "Already exists"})
+
+    if model is User:
+        # new users have no favorites, avoid one lazy load per user in serialize()
+        for user in created:
+            set_committed_value(user, "favorites", [])
+
+    return created, sorted(conflicts, key=lambda conflict: conflict["index"])
+
+def bulk_response(created, conflicts):
+    return {
+        "created": [obj.serialize() for obj in created],
+        "conflicts": conflicts
+    }
+
+FAVORITES_DIFF_FIELDS = ["add_planets", "remove_planets", "add_peoples", "remove_peoples"]
+
+def favorites_diff():
+    """Reads {"add_planets": [ids], "remove_planets": [ids], "add_peoples": [ids], "remove_peoples": [ids]}."""
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict) or not any(field in data for field in FAVORITES_DIFF_FIELDS):
+        raise APIException("Missing data", status_code=400)
+
+    diff = {}
+    for field in FAVORITES_DIFF_FIELDS:
+        ids = data.get(field, [])
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise APIException(f"{field} must be a list of ids", status_code=400)
+        if len(ids) > BULK_MAX_ITEMS:
+            raise APIException(f"Too many ids in {field}, the maximum is {BULK_MAX_ITEMS}", status_code=400)
+        diff[field] = sorted(set(ids))
+
+    return diff
@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request, current_app
+from compression import request_encoding, cached_variant
+from metrics import record_cache
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_TTL = int(os.getenv("CACHE_TTL", 300))
+
+class CacheBackend:
+    """
+    Interface for the response cache. Values are the response body as bytes.
+    A shared backend (redis, memcached...) only needs to implement these methods
+    and be installed with set_backend().
+    """
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def get_variant(self, key, variant):
+        """
+        Another representation of the entry (its gzip body...). Stored with the entry:
+        it takes no slot, is not counted as a hit or miss and goes away with it.
+        """
+        raise NotImplementedError
+
+    def set_variant(self, key, variant, value):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+class LRUCache(CacheBackend):
+    """In-process cache: least recently used entries are evicted first, entries expire after ttl seconds."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                value = None
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+        record_cache("misses" if value is None else "hits")
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = 0
+        with self.lock:
+            # (body, expires, variants)
+            self.entries[key] = (value, expires, {})
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            record_cache("evictions", evicted)
+
+    def get_variant(self, key, variant):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[2].get(variant)
+
+    def set_variant(self, key, variant, value):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[2][variant] = value
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self.lock:
+            for key in [k for k in self.entries if k.startswith(prefix)]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "backend": "lru",
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+backend = LRUCache()
+
+def set_backend(new_backend):
+    global backend
+    backend = new_backend
+
+def get_backend():
+    return backend
+
+def cached(key_template):
+    """
+    Caches the body of 200 responses. The key is built from the template with the
+    view arguments, the query string and the version read by @etag, e.g.
+    "planets:{planet_id}:{version}". Another worker's write bumps the version, so the
+    entries of this worker are not served with the new ETag. The lists share one
+    version per table, every detail has its own ("planets:<id>", bumped when that row
+    is deleted), so a new planet does not drop the cached bodies of the others.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED or "stream" in request.args:
+                return view(*args, **kwargs)
+
+            key = key_template.format(query=request.query_string.decode(), version=g.get("etag_version"), **kwargs)
+            encoding = request_encoding()
+            body = backend.get(key)
+            if body is not None:
+                response = current_app.response_class(body, mimetype="application/json")
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                backend.set(key, body)
+
+            # compressed once per cache entry, applied by compression.setup_compression
+            compressed = cached_variant(backend, key, body, encoding) if encoding else None
+            if compressed is not None:
+                g.precompressed = (encoding, compressed)
+            return response
+        return wrapper
+    return decorator
+
+def invalidate(*keys, prefix=None):
+    backend.delete(*keys)
+    if prefix is not None:
+        backend.delete_prefix(prefix)
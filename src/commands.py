@@ -0,0 +1,50 @@
+import time
+import click
+from models import db
+from favorites import rebuild_counts
+from versions import new_dataset
+from datagen import generate
+
+def setup_commands(app):
+
+    # $ flask popularity rebuild
+    @app.cli.group()
+    def popularity():
+        """Favorite counters of planets and people."""
+
+    @popularity.command("rebuild")
+    def popularity_rebuild():
+        """Recount planets/peoples favorites_count from the favorite tables."""
+        rebuild_counts()
+        db.session.commit()
+        click.echo("Favorite counters rebuilt")
+
+    # $ flask seed generate --users 1000000 --planets 100000 --peoples 100000 --favorites 10000000
+    @app.cli.group()
+    def seed():
+        """Synthetic data for load testing."""
+
+    @seed.command("generate")
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--planets", default=100, show_default=True)
+    @click.option("--peoples", default=100, show_default=True)
+    @click.option("--favorites", default=10000, show_default=True, help="Split between planets and people.")
+    @click.option("--seed", "seed_value", default=42, show_default=True, help="Random seed, same seed same data.")
+    @click.option("--chunk-size", default=10000, show_default=True)
+    @click.option("--yes", is_flag=True, help="Do not ask before dropping the tables.")
+    def seed_generate(users, planets, peoples, favorites, seed_value, chunk_size, yes):
+        """Drop all the tables and fill them with generated data."""
+        if not yes:
+            click.confirm("This drops all the tables of the database, continue?", abort=True)
+
+        db.drop_all()
+        db.create_all()
+
+        start = time.perf_counter()
+        generate(users, planets, peoples, favorites, seed=seed_value, chunk_size=chunk_size, report=click.echo)
+        rebuild_counts()
+        # the versions table was dropped too, the workers must not take the counters
+        # starting again at 0 for the ones of their cached bodies and ETags
+        new_dataset()
+        db.session.commit()
+        click.echo(f"Done in {time.perf_counter() - start:.1f} s")
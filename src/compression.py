@@ -0,0 +1,112 @@
+import os
+import gzip
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Response compression negotiated with Accept-Encoding. Brotli is used when the
+# brotli package is installed and the client accepts it, gzip otherwise. Bodies
+# smaller than COMPRESSION_MIN_SIZE are sent as they are: below ~1KB the headers
+# and the CPU cost outweigh the bytes saved.
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_LEVEL = int(os.getenv("BROTLI_LEVEL", 4))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_LEVEL)
+    # mtime=0 so the same body always gives the same bytes
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def choose_encoding(accept_encoding):
+    """The preferred encoding the client accepts (q > 0), or None for identity."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    best = None
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+def request_encoding():
+    if not COMPRESSION_ENABLED:
+        return None
+    return choose_encoding(request.headers.get("Accept-Encoding", ""))
+
+def compressible(response):
+    return (
+        response.status_code == 200
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and response.mimetype.startswith(COMPRESSIBLE_TYPES)
+    )
+
+def cached_variant(backend, key, body, encoding):
+    """
+    Compressed body for a cached response. The variant is kept in the cache entry of
+    the plain body, so a hit does not compress again and the cache stats only count
+    the lookups of the plain body.
+    """
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return None
+    compressed = backend.get_variant(key, encoding)
+    if compressed is None:
+        compressed = compress(body, encoding)
+        backend.set_variant(key, encoding, compressed)
+    return compressed
+
+def etag_variants(tag):
+    return [tag] + [f"{tag}-{encoding}" for encoding in ENCODINGS]
+
+def set_encoding(response, encoding, body):
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # another representation: the ETag must differ (validated by versions.etag)
+    tag, weak = response.get_etag()
+    if tag:
+        response.set_etag(f"{tag}-{encoding}", weak=weak)
+    return response
+
+def setup_compression(app):
+    """Compresses JSON responses larger than COMPRESSION_MIN_SIZE for clients that accept it."""
+    if not COMPRESSION_ENABLED:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if not response.mimetype.startswith(COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add("Accept-Encoding")
+        if not compressible(response):
+            return response
+        # set by cache.cached when the cache already holds the compressed body
+        precompressed = g.pop("precompressed", None)
+        if precompressed is not None:
+            return set_encoding(response, *precompressed)
+
+        encoding = request_encoding()
+        body = response.get_data()
+        if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        return set_encoding(response, encoding, compress(body, encoding))
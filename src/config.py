@@ -0,0 +1,119 @@
+import os
+import time
+import sqlite3
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from metrics import record_pool_wait
+
+# Database and connection pool settings, from environment variables:
+#
+#   DATABASE_URL         postgres url, falls back to a local sqlite file
+#   DB_POOL_SIZE         connections kept open per worker
+#   DB_MAX_OVERFLOW      extra connections allowed when the pool is empty
+#   DB_POOL_TIMEOUT      seconds to wait for a connection before failing
+#   DB_POOL_RECYCLE      seconds after which a connection is replaced (-1 disables)
+#   DB_POOL_PRE_PING     1 to test connections before using them
+
+DIALECT_DEFAULTS = {
+    "postgresql": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+    # a local file, connections do not go stale and are cheap to open
+    "sqlite": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 10, "pool_recycle": -1, "pool_pre_ping": False},
+}
+
+class PoolWaitStats:
+    """How long requests waited to check out a connection from the pool."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds):
+        with self.lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.total_wait, 6),
+                "wait_seconds_avg": round(self.total_wait / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.max_wait, 6),
+            }
+
+pool_wait = PoolWaitStats()
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            pool_wait.record(waited)
+            record_pool_wait(waited)
+
+def database_url():
+    db_url = os.getenv("DATABASE_URL")
+    if db_url is not None:
+        return db_url.replace("postgres://", "postgresql://")
+    return "sqlite:////tmp/test.db"
+
+def env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+@event.listens_for(Engine, "connect")
+def sqlite_foreign_keys(dbapi_connection, connection_record):
+    # sqlite ignores foreign keys unless asked, so a favorite list for a user that does
+    # not exist would be created instead of failing like on postgres
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def engine_options(url):
+    dialect = url.split(":", 1)[0].split("+", 1)[0]
+    if dialect == "sqlite" and ":memory:" in url:
+        # in memory databases live in a single connection, keep the default pool
+        return {}
+
+    defaults = DIALECT_DEFAULTS.get(dialect, DIALECT_DEFAULTS["postgresql"])
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", defaults["pool_timeout"])),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", defaults["pool_recycle"])),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", defaults["pool_pre_ping"]),
+    }
+
+def database_config():
+    url = database_url()
+    return {
+        "SQLALCHEMY_DATABASE_URI": url,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options(url),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    }
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    status.update(pool_wait.to_dict())
+    return status
@@ -0,0 +1,117 @@
+import io
+import csv
+import time
+import random
+from sqlalchemy import text
+from models import db
+from passwords import hash_password
+
+# Synthetic datasets for load testing. Rows are generated in chunks with a seeded
+# random generator (same options -> same data) and written with COPY on Postgres or
+# a multi-row executemany INSERT on other databases. Ids are given explicitly:
+# users, planets and peoples are numbered from 1, and user N owns favorite list N.
+
+SYLLABLES = ["ta", "too", "ine", "al", "der", "aan", "na", "boo", "ho", "th", "cor", "us",
+             "can", "kash", "yyy", "end", "or", "bes", "pin", "dag", "oba", "jak", "ku"]
+FIRST_NAMES = ["luke", "leia", "han", "rey", "finn", "poe", "padme", "anakin", "obi", "lando", "ahsoka", "din"]
+LAST_NAMES = ["skywalker", "organa", "solo", "kenobi", "amidala", "calrissian", "tano", "djarin", "dameron"]
+
+def name(rng, i):
+    # the counter keeps names unique (name_planet and name_people are unique columns)
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() + f" {i}"
+
+def users(rng, count, password):
+    for i in range(1, count + 1):
+        yield {"id": i, "name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+               "email": f"user{i}@example.com", "password": password}
+
+def planets(rng, count):
+    for i in range(1, count + 1):
+        yield {"id": i, "name_planet": name(rng, i), "favorites_count": 0}
+
+def peoples(rng, count):
+    for i in range(1, count + 1):
+        yield {"id": i, "name_people": name(rng, i), "favorites_count": 0}
+
+def favorites(count):
+    for i in range(1, count + 1):
+        yield {"id": i, "user_id": i}
+
+def favorite_items(rng, column, total, users, items):
+    """total (fav_id, item) rows spread over the users, no item twice in the same list."""
+    if not users or not items:
+        return
+    per_user, extra = divmod(total, users)
+    for fav_id in range(1, users + 1):
+        count = min(per_user + (fav_id <= extra), items)
+        for item_id in rng.sample(range(1, items + 1), count):
+            yield {"fav_id": fav_id, column: item_id}
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def copy_rows(table, rows):
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+    buffer.seek(0)
+
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def insert_rows(table, rows, chunk_size, report):
+    use_copy = db.engine.dialect.name == "postgresql"
+    start = time.perf_counter()
+    total = 0
+    for chunk in chunks(rows, chunk_size):
+        if use_copy:
+            copy_rows(table, chunk)
+        else:
+            db.session.execute(table.insert(), chunk)
+        total += len(chunk)
+    db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    report(f"{table.name:12} {total:>12,} rows  {elapsed:8.1f} s  {total / elapsed if elapsed else 0:>12,.0f} rows/s")
+    return total
+
+def reset_sequences(tables):
+    # explicit ids do not move the Postgres sequences
+    if db.engine.dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+        ))
+    db.session.commit()
+
+def generate(users_count, planets_count, peoples_count, favorites_count, seed=42, chunk_size=10_000, report=print):
+    rng = random.Random(seed)
+    tables = db.metadata.tables
+
+    # every user logs in with "not-a-real-password", hashed once
+    password = hash_password("not-a-real-password")
+    insert_rows(tables["users"], users(rng, users_count, password), chunk_size, report)
+    insert_rows(tables["planets"], planets(rng, planets_count), chunk_size, report)
+    insert_rows(tables["peoples"], peoples(rng, peoples_count), chunk_size, report)
+    insert_rows(tables["favorites"], favorites(users_count), chunk_size, report)
+
+    # half of the favorites are planets, half people
+    fav_planets = favorites_count // 2
+    insert_rows(tables["fav_planets"],
+                favorite_items(rng, "planet_id", fav_planets, users_count, planets_count), chunk_size, report)
+    insert_rows(tables["fav_people"],
+                favorite_items(rng, "people_id", favorites_count - fav_planets, users_count, peoples_count),
+                chunk_size, report)
+
+    reset_sequences(["users", "planets", "peoples", "favorites"])
@@ -0,0 +1,115 @@
+from sqlalchemy import select, delete, update, func
+from models import db, Favorite, FavPlanet, FavPeople, Planet, People
+from upsert import insert_ignore
+
+# Favorite writes as set-based statements. The favorite list of a user is created
+# lazily with an INSERT that does nothing if it already exists (favorites.user_id is
+# unique), so two concurrent requests can not create two lists or duplicate an item.
+
+# planets.favorites_count / peoples.favorites_count are updated in the same transaction
+# as the favorite rows, from the ids the INSERT/DELETE statements return.
+ITEM_MODELS = {FavPlanet: (Planet, "planet_id"), FavPeople: (People, "people_id")}
+NAME_COLUMNS = {FavPlanet: Planet.name_planet, FavPeople: People.name_people}
+
+def update_counts(model, item_ids, delta):
+    if not item_ids:
+        return
+    item_model, _ = ITEM_MODELS[model]
+    statement = (
+        update(item_model)
+        .where(item_model.id.in_(item_ids))
+        .values(favorites_count=item_model.favorites_count + delta)
+    )
+    db.session.execute(statement)
+
+def top_favorited(item_model, limit):
+    """The most favorited items, read from the (favorites_count, id) index: cost depends on limit only."""
+    statement = (
+        select(item_model)
+        .order_by(item_model.favorites_count.desc(), item_model.id.desc())
+        .limit(limit)
+    )
+    return db.session.execute(statement).scalars().all()
+
+def rebuild_counts():
+    """Recounts favorites_count from the favorite tables, to fix any drift."""
+    for model, (item_model, column) in ITEM_MODELS.items():
+        item_id = getattr(model, column)
+        # one aggregate over the favorite table instead of one count per item
+        counts = select(item_id.label("item_id"), func.count().label("total")).group_by(item_id).subquery()
+        db.session.execute(update(item_model).values(favorites_count=0))
+        db.session.execute(
+            update(item_model)
+            .where(item_model.id == counts.c.item_id)
+            .values(favorites_count=counts.c.total)
+        )
+
+def ensure_favorite(user_id):
+    db.session.execute(insert_ignore(Favorite).values(user_id=user_id))
+
+def favorite_id(user_id):
+    return select(Favorite.id).where(Favorite.user_id == user_id).scalar_subquery()
+
+def add_favorite(model, column, item_id, user_id):
+    """
+    Adds one item to the favorite list of the user (created first with ensure_favorite).
+    Returns the (fav_id, item name) row, or None if the item does not exist or was
+    already in the list: the id is selected from the planets/peoples table, like
+    add_favorites, so the existence check is not a separate round-trip.
+    """
+    item_model, _ = ITEM_MODELS[model]
+    statement = insert_ignore(model).from_select(
+        ["fav_id", column],
+        select(favorite_id(user_id), item_model.id).where(item_model.id == item_id)
+    ).returning(model.fav_id)
+
+    fav_id = db.session.execute(statement).scalar_one_or_none()
+    if fav_id is None:
+        return None
+
+    # the name comes back from the favorites_count update
+    statement = (
+        update(item_model)
+        .where(item_model.id == item_id)
+        .values(favorites_count=item_model.favorites_count + 1)
+        .returning(NAME_COLUMNS[model])
+    )
+    return fav_id, db.session.execute(statement).scalar_one()
+
+def remove_favorites(model, column, item_ids, user_id):
+    """Removes the items from the favorite list of the user, returns how many were removed."""
+    statement = delete(model).where(
+        model.fav_id == favorite_id(user_id),
+        getattr(model, column).in_(item_ids)
+    ).returning(getattr(model, column))
+
+    removed = db.session.execute(statement).scalars().all()
+    update_counts(model, removed, -1)
+    return len(removed)
+
+def add_favorites(model, column, item_model, item_ids, user_id):
+    # ids that do not exist in the planets/peoples table are skipped by the select
+    statement = insert_ignore(model).from_select(
+        ["fav_id", column],
+        select(favorite_id(user_id), item_model.id).where(item_model.id.in_(item_ids))
+    ).returning(getattr(model, column))
+
+    added = db.session.execute(statement).scalars().all()
+    update_counts(model, added, 1)
+
+def apply_favorites_diff(user_id, diff):
+    """
+    Applies the ids to add and to remove for planets and people with one DELETE and
+    one INSERT ... SELECT per table, whatever the number of ids. Removals run first,
+    so an id present in both lists ends up in the list.
+    """
+    ensure_favorite(user_id)
+
+    if diff["remove_planets"]:
+        remove_favorites(FavPlanet, "planet_id", diff["remove_planets"], user_id)
+    if diff["remove_peoples"]:
+        remove_favorites(FavPeople, "people_id", diff["remove_peoples"], user_id)
+    if diff["add_planets"]:
+        add_favorites(FavPlanet, "planet_id", Planet, diff["add_planets"], user_id)
+    if diff["add_peoples"]:
+        add_favorites(FavPeople, "people_id", People, diff["add_peoples"], user_id)
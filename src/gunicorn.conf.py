@@ -0,0 +1,95 @@
+"""
+Gunicorn settings, read with `-c`:
+
+    $ gunicorn --chdir ./src/ -c ./src/gunicorn.conf.py
+
+The app is chosen here (wsgi_app), do not pass it on the command line: gunicorn
+would use that one instead, whatever the worker class.
+
+The app is loaded once in the master (preload) and the workers are forked from it,
+so they share its memory pages copy-on-write. Connections opened before the fork
+are dropped, and every worker opens its own.
+"""
+import os
+import gc
+import logging
+import multiprocessing
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3000')}"
+
+# sync: one request at a time per worker, gthread: GUNICORN_THREADS per worker,
+# uvicorn: the async read handlers of asgi.py (needs the uvicorn package)
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn.workers.UvicornWorker",
+}
+WORKER = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+worker_class = WORKER_CLASSES.get(WORKER, WORKER)
+wsgi_app = "asgi:application" if WORKER == "uvicorn" else "wsgi:application"
+
+# WEB_CONCURRENCY is what Heroku and Render set. Every worker has its own connection
+# pool (DB_POOL_SIZE + DB_MAX_OVERFLOW), keep workers * pool under the database limit.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4 if WORKER == "gthread" else 1))
+
+# restart workers after some requests, with jitter so they do not all restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# requested once in the master before forking, so every worker starts with the
+# autocomplete indexes built and the response cache filled
+WARM_UP_PATHS = [path for path in os.getenv(
+    "WARM_UP_PATHS", "/autocomplete/planets?q=a,/autocomplete/peoples?q=a,/planets,/peoples"
+).split(",") if path]
+
+def flask_app(server):
+    application = server.app.wsgi()
+    # asgi.AsyncReadApp wraps the Flask app
+    return getattr(application, "flask_app", application)
+
+def dispose_engines(app, close):
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=close)
+    if WORKER == "uvicorn":
+        import asgi
+        asgi.engine.sync_engine.dispose(close=close)
+
+def when_ready(server):
+    # runs in the master, before the first worker is forked
+    if not preload_app:
+        return
+
+    app = flask_app(server)
+    client = app.test_client()
+    for path in WARM_UP_PATHS:
+        try:
+            response = client.get(path)
+            logger.info("warm up %s: %s", path, response.status_code)
+        except Exception:
+            logger.exception("warm up %s failed", path)
+
+    # no connection may be shared with the workers
+    dispose_engines(app, close=True)
+    # objects loaded so far are never collected, so the collector does not write to
+    # (and un-share) their pages in every worker
+    gc.freeze()
+
+def post_fork(server, worker):
+    if preload_app:
+        # the pool copied from the master must not close connections it does not own
+        dispose_engines(flask_app(server), close=False)
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Opt-in per request SQL instrumentation (SQL_INSTRUMENTATION=1). When it is off no
+# listener is registered, so there is no cost at all.
+#
+# Every response gets a Server-Timing header with the database time and query count,
+# requests slower than SLOW_REQUEST_MS are logged as one JSON line with their slowest
+# statements, and requests running more than QUERY_BUDGET queries log a warning with
+# the most repeated statement (usually an N+1).
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "0") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", 20))
+SLOWEST_STATEMENTS = 3
+
+logger = logging.getLogger("instrumentation")
+
+# the queries of a request answered by asgi.py, which has no Flask request context
+async_queries = ContextVar("async_queries", default=None)
+
+class RequestQueries:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total = 0.0
+        self.statements = []
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total += seconds
+        self.statements.append((seconds, statement))
+
+    def slowest(self):
+        return [
+            {"ms": round(seconds * 1000, 2), "statement": " ".join(statement.split())[:500]}
+            for seconds, statement in sorted(self.statements, reverse=True)[:SLOWEST_STATEMENTS]
+        ]
+
+    def most_repeated(self):
+        statement, times = Counter(statement for _, statement in self.statements).most_common(1)[0]
+        return {"times": times, "statement": " ".join(statement.split())[:500]}
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    queries = g.get("queries") if has_request_context() else async_queries.get()
+    if queries is not None:
+        queries.record(statement, time.perf_counter() - started)
+
+def start_request():
+    g.queries = RequestQueries()
+
+def report(queries, method, path, endpoint, status):
+    """Logs the request if it is slow or over budget, returns its Server-Timing values."""
+    elapsed = (time.perf_counter() - queries.started) * 1000
+    db_ms = queries.total * 1000
+
+    line = {
+        "method": method,
+        "path": path,
+        "endpoint": endpoint,
+        "status": status,
+        "ms": round(elapsed, 2),
+        "db_ms": round(db_ms, 2),
+        "queries": queries.count,
+    }
+    if elapsed > SLOW_REQUEST_MS:
+        logger.warning(json.dumps({"event": "slow_request", **line, "slowest": queries.slowest()}))
+    if queries.count > QUERY_BUDGET:
+        logger.warning(json.dumps({"event": "query_budget_exceeded", "budget": QUERY_BUDGET, **line,
+                                   "most_repeated": queries.most_repeated()}))
+    return [f'db;dur={db_ms:.2f};desc="{queries.count} queries"', f"app;dur={elapsed:.2f}"]
+
+def finish_request(response):
+    queries = g.pop("queries", None)
+    if queries is None:
+        return response
+
+    timings = report(queries, request.method, request.full_path.rstrip("?"), request.endpoint, response.status_code)
+    for timing in timings:
+        response.headers.add("Server-Timing", timing)
+    return response
+
+def setup_instrumentation(app, enabled=SQL_INSTRUMENTATION):
+    if not enabled:
+        return
+
+    # on every engine (the asyncio one of asgi.py too), once even if create_app runs again
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,29 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Keys are sorted and the output is compact,
+    like the default provider outside debug mode, so responses keep the same fields.
+    """
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.options) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def setup_json(app):
+    """Installs orjson as the JSON provider when it is installed, otherwise keeps the stdlib one."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
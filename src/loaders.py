@@ -0,0 +1,23 @@
+from sqlalchemy.orm import selectinload, joinedload
+from models import User, Favorite, FavPlanet, FavPeople
+
+# Loader strategies used by the endpoints, so the number of queries does not
+# grow with the number of rows (no N+1 when serialize() walks relationships).
+#
+# selectinload -> one extra "SELECT ... WHERE id IN (...)" per relationship level
+# joinedload   -> many-to-one, resolved in the same SELECT with a JOIN
+
+def favorite_items():
+    return [
+        selectinload(Favorite.planets).joinedload(FavPlanet.planet),
+        selectinload(Favorite.peoples).joinedload(FavPeople.people),
+    ]
+
+def user_with_favorites():
+    return [selectinload(User.favorites).options(*favorite_items())]
+
+def fav_planet_items():
+    return [joinedload(FavPlanet.planet)]
+
+def fav_people_items():
+    return [joinedload(FavPeople.people)]
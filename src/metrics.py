@@ -0,0 +1,117 @@
+import os
+import time
+from flask import g, request, Response
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY
+    from prometheus_client import generate_latest, multiprocess, CONTENT_TYPE_LATEST
+except ImportError:  # pragma: no cover
+    Counter = None
+
+# Prometheus metrics for every route, recorded by request hooks (no decorator per view).
+# Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory: every worker writes
+# its values there and /metrics adds them up, whatever worker answers the scrape.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# pool and cache size gauges are refreshed at most once per interval per worker
+METRICS_GAUGE_INTERVAL = float(os.getenv("METRICS_GAUGE_INTERVAL", 1))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+if Counter is not None:
+    REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+    LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency",
+                        ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+    IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being handled",
+                        multiprocess_mode="livesum")
+    REJECTED = Counter("http_requests_rejected_total", "Requests rejected before reaching the view",
+                       ["route", "reason"])
+    POOL = Gauge("db_pool_connections", "Database pool connections", ["state"], multiprocess_mode="livesum")
+    # counters, incremented where it happens (config.TimedQueuePool, cache.LRUCache): they
+    # keep adding up across worker restarts, unlike a copy of the worker's own totals
+    POOL_WAIT = Counter("db_pool_wait_seconds", "Time spent waiting for a pool connection")
+    CACHE = Counter("response_cache_operations", "Response cache lookups and evictions", ["result"])
+    CACHE_ENTRIES = Gauge("response_cache_entries", "Entries in the response cache", multiprocess_mode="livesum")
+
+def route():
+    # the rule, not the path, so /planets/1 and /planets/2 are one series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+def metrics_enabled():
+    return Counter is not None and METRICS_ENABLED
+
+def observe_request(method, route, status, seconds):
+    # also called by asgi.py for the GETs it answers without Flask
+    labels = (method, route, str(status))
+    REQUESTS.labels(*labels).inc()
+    LATENCY.labels(*labels).observe(seconds)
+
+def record_pool_wait(seconds):
+    if metrics_enabled():
+        POOL_WAIT.inc(seconds)
+
+def record_cache(result, count=1):
+    # result: "hits", "misses" or "evictions"
+    if metrics_enabled():
+        CACHE.labels(result).inc(count)
+
+def record_rejected(reason):
+    # called by ratelimit.py, the response itself is also counted in http_requests_total
+    if metrics_enabled():
+        REJECTED.labels(route(), reason).inc()
+
+class GaugeRefresher:
+    # pool and cache sizes are read from this worker, livesum adds them up across workers
+    def __init__(self, db):
+        self.db = db
+        self.refreshed = 0.0
+
+    def __call__(self):
+        now = time.monotonic()
+        if now - self.refreshed < METRICS_GAUGE_INTERVAL:
+            return
+        self.refreshed = now
+
+        from config import pool_status
+        from cache import get_backend
+
+        pool = pool_status(self.db.engine)
+        for state in ("checked_out", "idle", "overflow"):
+            if state in pool:
+                POOL.labels(state).set(pool[state])
+
+        CACHE_ENTRIES.set(get_backend().stats().get("entries", 0))
+
+def setup_metrics(app, db):
+    """Records every request and adds the /metrics route, when prometheus_client is installed."""
+    if not metrics_enabled():
+        return
+
+    refresh_gauges = GaugeRefresher(db)
+
+    @app.before_request
+    def start_timer():
+        # before this request takes a connection, so it is not counted as checked out
+        refresh_gauges()
+        g.metrics_start = time.perf_counter()
+        IN_PROGRESS.inc()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            observe_request(request.method, route(), response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        IN_PROGRESS.dec()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,9 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index, DDL, event, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 db = SQLAlchemy()
 
+def search_indexes(table, column):
+    # same indexes as migration e3a9c41b7d62, so create_all() (flask seed generate,
+    # benchmarks) builds them too. Postgres only, SQLite searches without them.
+    return (
+        Index(f"ix_{table}_{column}_prefix", text(f"lower({column}) text_pattern_ops")).ddl_if(dialect="postgresql"),
+        Index(f"ix_{table}_{column}_trgm", column, postgresql_using="gin",
+              postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
 class User(db.Model):
     __tablename__ = "users"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -29,7 +38,8 @@ class User(db.Model):
 class Favorite(db.Model):
     __tablename__ = "favorites"
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # one favorite list per user
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True)
         
     # relationship with other tables
     user: Mapped["User"] = relationship(back_populates="favorites")
@@ -82,6 +92,10 @@ class Planet(db.Model):
     __tablename__ = "planets"
     id: Mapped[int] = mapped_column(primary_key=True)
     name_planet: Mapped[str] = mapped_column(String(100), unique=True)
+    # how many favorite lists have this planet, kept up to date by the favorites endpoints
+    favorites_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    __table_args__ = (Index("ix_planets_popularity", "favorites_count", "id"), *search_indexes("planets", "name_planet"))
 
     # relationship with other tables
     fav_planet: Mapped[list["FavPlanet"]] = relationship(back_populates="planet")
@@ -96,6 +110,10 @@ class People(db.Model):
     __tablename__ = "peoples"
     id: Mapped[int] = mapped_column(primary_key=True)
     name_people: Mapped[str] = mapped_column(String(100), unique=True)
+    # how many favorite lists have this person, kept up to date by the favorites endpoints
+    favorites_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    __table_args__ = (Index("ix_peoples_popularity", "favorites_count", "id"), *search_indexes("peoples", "name_people"))
 
    # relationship with other tables
     fav_people: Mapped[list["FavPeople"]] = relationship(back_populates="people")
@@ -105,3 +123,20 @@ class People(db.Model):
             "id": self.id,
             "name_people": self.name_people
         }
+
+class Version(db.Model):
+    __tablename__ = "versions"
+    # "planets", "peoples" (the lists), "planets:<id>", "peoples:<id>" or "favorites:<user_id>",
+    # bumped on every write to that data
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
+
+    def serialize(self):
+        return {
+            "key": self.key,
+            "version": self.version
+        }
+
+# the trigram indexes need the extension, created by the migration otherwise
+event.listen(db.metadata, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
@@ -0,0 +1,68 @@
+import os
+import base64
+import binascii
+from flask import request, url_for
+from utils import APIException
+from models import db
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+# The cursor is the last primary key of the page, encoded so clients treat it as opaque.
+# Pages are read with "WHERE id > :after ORDER BY id LIMIT :limit", which uses the
+# primary key index and costs the same on any page (no OFFSET).
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise APIException("Invalid cursor", status_code=400)
+
+def page_args(args=None):
+    args = request.args if args is None else args
+
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = None
+    if limit is None or limit < 1:
+        raise APIException("limit must be a positive integer", status_code=400)
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = args.get("after")
+    if after is not None:
+        after = decode_cursor(after)
+
+    return limit, after
+
+def page_statement(statement, key, limit, after):
+    if after is not None:
+        statement = statement.where(key > after)
+
+    # we ask for one extra row to know if there is a next page
+    return statement.order_by(key).limit(limit + 1)
+
+def paginate(statement, key):
+    limit, after = page_args()
+
+    items = db.session.execute(page_statement(statement, key, limit, after)).all()
+
+    next_url = None
+    if len(items) > limit:
+        items = items[:limit]
+        # keep the other arguments (filters) of the request in the next link
+        args = request.args.to_dict()
+        args.update(limit=limit, after=encode_cursor(items[-1].id))
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    return items, next_url
+
+def page_response(items, next_url, serialize):
+    return {
+        "results": serialize(items),
+        "next": next_url
+    }
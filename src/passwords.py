@@ -0,0 +1,118 @@
+import os
+import hmac
+import threading
+from functools import cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+from utils import APIException
+
+# Password hashing with werkzeug's formats ("scrypt:32768:8:1$salt$hash",
+# "pbkdf2:sha256:600000$salt$hash"). PASSWORD_HASH_METHOD sets the algorithm and its
+# cost; hashes made with other settings still verify and are replaced at the next
+# login, like the plaintext passwords stored before hashing was added.
+#
+# Hashing takes tens of milliseconds of CPU, so it runs in a bounded pool of
+# PASSWORD_HASH_WORKERS threads (hashlib releases the GIL) or processes. At most
+# PASSWORD_HASH_QUEUE hashes wait for the pool, past that signups and logins get a 503
+# instead of piling up behind each other.
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 64))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+METHOD_PREFIXES = ("scrypt:", "pbkdf2:")
+
+executor = None
+executor_lock = threading.Lock()
+slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+def get_executor():
+    # created on first use, so every gunicorn worker gets its own after the fork
+    global executor
+    with executor_lock:
+        if executor is None:
+            pool = ProcessPoolExecutor if PASSWORD_HASH_POOL == "process" else ThreadPoolExecutor
+            executor = pool(max_workers=PASSWORD_HASH_WORKERS)
+        return executor
+
+def shutdown():
+    global executor, slots
+    with executor_lock:
+        if executor is not None:
+            executor.shutdown()
+        executor = None
+        slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+def acquire(count):
+    for acquired in range(count):
+        if not slots.acquire(blocking=False):
+            release(acquired)
+            raise APIException("Too many password operations, try again", status_code=503)
+
+def release(count):
+    for _ in range(count):
+        slots.release()
+
+def run_all(func, calls):
+    acquire(len(calls))
+    futures = []
+    try:
+        for args in calls:
+            future = get_executor().submit(func, *args)
+            # the slot is free when the hash is done, not when the request stops waiting
+            future.add_done_callback(lambda _: release(1))
+            futures.append(future)
+    except BaseException:
+        release(len(calls) - len(futures))
+        raise
+
+    try:
+        return [future.result(timeout=PASSWORD_HASH_TIMEOUT) for future in futures]
+    except FutureTimeoutError:
+        # the builtin TimeoutError only from Python 3.11, render.yaml deploys 3.10
+        raise APIException("Password hashing timed out, try again", status_code=503)
+
+def hash_password(password):
+    return run_all(generate_password_hash, [(password, PASSWORD_HASH_METHOD)])[0]
+
+def hash_passwords(passwords):
+    """Hashes of a bulk request, PASSWORD_HASH_WORKERS at a time so it does not fill the queue."""
+    hashes = []
+    for start in range(0, len(passwords), PASSWORD_HASH_WORKERS):
+        chunk = passwords[start:start + PASSWORD_HASH_WORKERS]
+        hashes += run_all(generate_password_hash, [(password, PASSWORD_HASH_METHOD) for password in chunk])
+    return hashes
+
+def is_hashed(stored):
+    return stored.startswith(METHOD_PREFIXES) and stored.count("$") == 2
+
+@cache
+def full_method(method):
+    # "pbkdf2" is stored as "pbkdf2:sha256:1000000", compare with what werkzeug writes
+    return generate_password_hash("", method).split("$", 1)[0]
+
+def needs_rehash(stored):
+    return not is_hashed(stored) or stored.split("$", 1)[0] != full_method(PASSWORD_HASH_METHOD)
+
+@cache
+def unknown_user_hash(method):
+    return generate_password_hash(os.urandom(16).hex(), method)
+
+def verify_unknown_user(password):
+    # same work as a wrong password, so response times do not tell which emails exist
+    run_all(check_password_hash, [(unknown_user_hash(PASSWORD_HASH_METHOD), password)])
+    return False, None
+
+def verify_password(stored, password):
+    """(matches, new hash to store or None). The new hash is set when the settings changed."""
+    if is_hashed(stored):
+        matches = run_all(check_password_hash, [(stored, password)])[0]
+    else:
+        # stored before passwords were hashed
+        matches = hmac.compare_digest(stored.encode(), password.encode())
+
+    if matches and needs_rehash(stored):
+        return True, hash_password(password)
+    return matches, None
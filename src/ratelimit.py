@@ -0,0 +1,177 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from flask import g, request, jsonify
+from metrics import record_rejected
+
+# Protection of the write endpoints (POST, PUT, PATCH, DELETE):
+#
+# - a token bucket per client and route: RATELIMIT_BURST requests at once, then
+#   RATELIMIT_RATE per second, answered with 429 and Retry-After past that
+# - admission control: at most ADMISSION_MAX_WRITES writes running at the same time
+#   in a worker, so a burst can not take every pool connection and starve the reads.
+#   The default leaves the pool overflow to the reads. Past that: 503 and Retry-After.
+
+RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "1") == "1"
+RATELIMIT_RATE = float(os.getenv("RATELIMIT_RATE", 10))
+RATELIMIT_BURST = int(os.getenv("RATELIMIT_BURST", 50))
+RATELIMIT_MAX_KEYS = int(os.getenv("RATELIMIT_MAX_KEYS", 10_000))
+# use the first X-Forwarded-For address, only behind a proxy that sets it
+RATELIMIT_TRUST_PROXY = os.getenv("RATELIMIT_TRUST_PROXY", "0") == "1"
+ADMISSION_MAX_WRITES = int(os.getenv("ADMISSION_MAX_WRITES", os.getenv("DB_POOL_SIZE", 5)))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+def refill(tokens, updated, now, rate, burst):
+    """Token bucket after a request at `now`: (tokens left, seconds to wait, 0 when allowed)."""
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+class RateLimitBackend:
+    """
+    Storage of the token buckets. take() spends one token of the bucket and returns
+    0 when the request is allowed, otherwise the seconds until a token is available.
+    """
+    def take(self, key, rate, burst):
+        raise NotImplementedError
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets of this worker only: with N workers a client gets up to N times the rate."""
+
+    def __init__(self, max_keys=RATELIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (burst, now))
+            tokens, wait = refill(tokens, updated, now, rate, burst)
+            self.buckets[key] = (tokens, now)
+            # the least recently seen clients are forgotten (their bucket is full again)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+class StoreBackend(RateLimitBackend):
+    """
+    Buckets kept in a store shared by every worker and host. The store needs two
+    methods: get(key) and compare_and_set(key, expected, value, ttl), which writes
+    value only if the current value is still expected (None: missing) and returns
+    whether it did. With redis that is a WATCH/MULTI transaction or a small Lua script.
+    """
+    ATTEMPTS = 5
+
+    def __init__(self, store):
+        self.store = store
+
+    def take(self, key, rate, burst):
+        # wall clock, the buckets are shared between machines
+        ttl = math.ceil(burst / rate) + 1
+        for _ in range(self.ATTEMPTS):
+            now = time.time()
+            current = self.store.get(key)
+            if current is None:
+                tokens, updated = burst, now
+            else:
+                tokens, updated = (float(value) for value in current.split(":"))
+            tokens, wait = refill(tokens, updated, now, rate, burst)
+            if self.store.compare_and_set(key, current, f"{tokens}:{now}", ttl):
+                return wait
+        # too much contention on this key: let the request through
+        return 0.0
+
+class LocalStore:
+    """In-process stand-in for a shared store, to run StoreBackend without redis."""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.values.get(key, (None, 0))
+            return value if expires > time.time() else None
+
+    def compare_and_set(self, key, expected, value, ttl):
+        with self.lock:
+            current, expires = self.values.get(key, (None, 0))
+            if expires <= time.time():
+                current = None
+            if current != expected:
+                return False
+            self.values[key] = (value, time.time() + ttl)
+            return True
+
+backend = MemoryBackend()
+
+def set_backend(new_backend):
+    global backend
+    backend = new_backend
+
+def get_backend():
+    return backend
+
+def client_id():
+    if RATELIMIT_TRUST_PROXY and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or "unknown"
+
+class Admission:
+    """Counts the writes running in this worker (threads included)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.running = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            if self.running >= self.limit:
+                return False
+            self.running += 1
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.running -= 1
+
+def rejected(status, message, retry_after, reason):
+    record_rejected(reason)
+    response = jsonify({"message": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def setup_rate_limits(app):
+    """Token bucket per client and route plus admission control, on the write methods."""
+    if not RATELIMIT_ENABLED:
+        return
+
+    admission = Admission(ADMISSION_MAX_WRITES)
+
+    @app.before_request
+    def limit_writes():
+        if request.method not in WRITE_METHODS or request.url_rule is None:
+            return None
+
+        key = f"{client_id()}:{request.method}:{request.url_rule.rule}"
+        wait = backend.take(key, RATELIMIT_RATE, RATELIMIT_BURST)
+        if wait > 0:
+            return rejected(429, "Too many requests", wait, "rate_limit")
+
+        if not admission.enter():
+            return rejected(503, "Server busy, try again", ADMISSION_RETRY_AFTER, "admission")
+        g.admitted = True
+        return None
+
+    @app.teardown_request
+    def leave_admission(error=None):
+        if g.pop("admitted", False):
+            admission.leave()
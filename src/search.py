@@ -0,0 +1,27 @@
+from flask import request
+from sqlalchemy import func
+from utils import APIException
+
+# Name search for the list endpoints: ?q=<text>&match=prefix (default) or ?match=contains.
+# Both are case insensitive. On Postgres they use the indexes of migration e3a9c41b7d62:
+#   prefix   -> lower(name) LIKE 'text%'  (btree on lower(name) text_pattern_ops)
+#   contains -> name ILIKE '%text%'       (GIN trigram index on name)
+# On SQLite they work without an index.
+
+MATCHES = ("prefix", "contains")
+
+def escape_like(value):
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+def name_search(statement, column):
+    q = request.args.get("q")
+    if not q:
+        return statement
+
+    match = request.args.get("match", "prefix")
+    if match not in MATCHES:
+        raise APIException("match must be one of: " + ", ".join(MATCHES), status_code=400)
+
+    if match == "prefix":
+        return statement.where(func.lower(column).like(escape_like(q.lower()) + "%", escape="/"))
+    return statement.where(column.ilike("%" + escape_like(q) + "%", escape="/"))
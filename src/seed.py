@@ -1,13 +1,18 @@
-from app import app, db
-from models import User, Favorite, Planet, People, FavPeople, FavPlanet
+from app import create_app
+from models import db, User, Favorite, Planet, People, FavPeople, FavPlanet
+from passwords import hash_password
+from favorites import rebuild_counts
+from versions import new_dataset
+
+app = create_app(api_only=True)
 
 with app.app_context():
     db.drop_all()
     db.create_all()
 
     #Create users and fovourite list
-    new_user1 = User(name="vicky", last_name="barbosa", email= "vb@gmail.com", password="123456789")
-    new_user2 = User(name="lola", last_name="Lopez", email= "ll@gmail.com", password="123456789")
+    new_user1 = User(name="vicky", last_name="barbosa", email= "vb@gmail.com", password=hash_password("123456789"))
+    new_user2 = User(name="lola", last_name="Lopez", email= "ll@gmail.com", password=hash_password("123456789"))
     db.session.add_all([new_user1, new_user2])
     db.session.commit()
 
@@ -35,5 +40,10 @@ with app.app_context():
     people_fav1 = FavPeople(fav_id=fav1.id, people_id=people1.id)
     people_fav2 = FavPeople(fav_id=fav2.id, people_id=people2.id)
     db.session.add_all([people_fav1, people_fav2])
+    db.session.flush()
 
+    #favorites_count of planets and people, read by /planets/top and /peoples/top
+    rebuild_counts()
+    #not the cache keys and ETags of the data dropped above
+    new_dataset()
     db.session.commit()
@@ -0,0 +1,108 @@
+from sqlalchemy import select
+from models import db, User, Favorite, FavPlanet, FavPeople, Planet, People
+
+# Serialization of the list endpoints from plain column selects: rows are tuples,
+# no ORM objects or identity map, and the output is the same as Model.serialize().
+# Each function takes a batch of rows (a page, or a chunk of a stream).
+
+class PlanetRow:
+    """Read-only planet, two slots instead of a mapped instance in the identity map."""
+    __slots__ = ("id", "name_planet")
+
+    def __init__(self, id, name_planet):
+        self.id = id
+        self.name_planet = name_planet
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "name": self.name_planet
+        }
+
+class PeopleRow:
+    """Read-only person, two slots instead of a mapped instance in the identity map."""
+    __slots__ = ("id", "name_people")
+
+    def __init__(self, id, name_people):
+        self.id = id
+        self.name_people = name_people
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "name_people": self.name_people
+        }
+
+def planet_columns():
+    return select(Planet.id, Planet.name_planet)
+
+def people_columns():
+    return select(People.id, People.name_people)
+
+def user_columns():
+    return select(User.id, User.name, User.last_name, User.email)
+
+def get_planet_row(planet_id):
+    row = db.session.execute(planet_columns().where(Planet.id == planet_id)).first()
+    return None if row is None else PlanetRow(*row)
+
+def get_people_row(people_id):
+    row = db.session.execute(people_columns().where(People.id == people_id)).first()
+    return None if row is None else PeopleRow(*row)
+
+def serialize_planets(rows):
+    return [{"id": id, "name": name} for id, name in rows]
+
+def serialize_peoples(rows):
+    return [{"id": id, "name_people": name} for id, name in rows]
+
+def favorites_statements(user_ids):
+    """Favorite lists, their planets and their people for a batch of users, one query each."""
+    lists = select(Favorite.id, Favorite.user_id).where(Favorite.user_id.in_(user_ids))
+    planets = (
+        select(FavPlanet.fav_id, FavPlanet.planet_id, Planet.name_planet)
+        .join(Planet, Planet.id == FavPlanet.planet_id)
+        .join(Favorite, Favorite.id == FavPlanet.fav_id)
+        .where(Favorite.user_id.in_(user_ids))
+    )
+    peoples = (
+        select(FavPeople.fav_id, FavPeople.people_id, People.name_people)
+        .join(People, People.id == FavPeople.people_id)
+        .join(Favorite, Favorite.id == FavPeople.fav_id)
+        .where(Favorite.user_id.in_(user_ids))
+    )
+    return lists, planets, peoples
+
+def build_favorites(list_rows, planet_rows, people_rows):
+    """user id -> favorite lists, from the rows of favorites_statements()."""
+    favorites = {}
+    lists = {}
+    for fav_id, user_id in list_rows:
+        lists[fav_id] = {"id": fav_id, "user_id": user_id, "favorite_planets": [], "favorite_people": []}
+        favorites.setdefault(user_id, []).append(lists[fav_id])
+    for fav_id, planet_id, name in planet_rows:
+        lists[fav_id]["favorite_planets"].append({"fav_id": fav_id, "planet_id": planet_id, "planet_name": name})
+    for fav_id, people_id, name in people_rows:
+        lists[fav_id]["favorite_people"].append({"fav_id": fav_id, "people_id": people_id, "people_name": name})
+    return favorites
+
+def serialize_favorites(user_ids):
+    """Favorite lists of the users, one query per table for the whole batch."""
+    if not user_ids:
+        return {}
+    return build_favorites(*(db.session.execute(statement) for statement in favorites_statements(user_ids)))
+
+def user_dicts(rows, favorites):
+    return [
+        {
+            "id": id,
+            "name": name,
+            "last name": last_name,
+            "email": email,
+            "favorites": favorites.get(id, [])
+        }
+        for id, name, last_name, email in rows
+    ]
+
+def serialize_users(rows):
+    return user_dicts(rows, serialize_favorites([row.id for row in rows]))
@@ -0,0 +1,38 @@
+import os
+from flask import Response, current_app, stream_with_context
+from utils import APIException
+from models import db
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1000))
+
+# Full exports: rows are fetched from a server-side cursor in chunks (yield_per) and
+# written to the client as they are serialized, so memory does not grow with the table.
+
+def ndjson_chunks(items):
+    for item in items:
+        yield current_app.json.dumps(item) + "\n"
+
+def json_array_chunks(items):
+    yield "["
+    first = True
+    for item in items:
+        yield ("" if first else ",") + current_app.json.dumps(item)
+        first = False
+    yield "]\n"
+
+FORMATS = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+    "json": (json_array_chunks, "application/json"),
+}
+
+def stream_response(statement, fmt, serialize):
+    if fmt not in FORMATS:
+        raise APIException("stream must be one of: " + ", ".join(FORMATS), status_code=400)
+    chunks, mimetype = FORMATS[fmt]
+
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        # serialize() gets one chunk of rows at a time
+        yield from chunks(item for rows in result.partitions() for item in serialize(rows))
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
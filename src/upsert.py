@@ -0,0 +1,32 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db
+
+# Postgres and SQLite only: the callers (bulk_create, the favorites writes) read the
+# inserted rows back with RETURNING, which MySQL does not have.
+
+def insert_ignore(model):
+    """
+    INSERT that skips the rows violating a unique or primary key constraint instead of
+    failing the whole statement (ON CONFLICT DO NOTHING).
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+
+    raise NotImplementedError(f"insert_ignore is not supported on {dialect}, use postgresql or sqlite")
+
+def insert_or_update(model, values, index_elements, set_):
+    """INSERT ... ON CONFLICT (index_elements) DO UPDATE SET set_, in one statement."""
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        statement = postgresql.insert(model).values(**values)
+        return statement.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    if dialect == "sqlite":
+        statement = sqlite.insert(model).values(**values)
+        return statement.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+    raise NotImplementedError(f"insert_or_update is not supported on {dialect}, use postgresql or sqlite")
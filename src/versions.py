@@ -0,0 +1,75 @@
+import time
+import hashlib
+from functools import wraps
+from flask import g, request, current_app
+from sqlalchemy import select
+from models import db, Version
+from upsert import insert_or_update
+from compression import etag_variants
+
+# Version counters stored in the database, so every gunicorn worker sees the same value.
+# Write endpoints bump the counter in the same transaction as the change, and GET
+# endpoints derive their ETag from it: a 304 only costs one primary key lookup.
+
+# Generation of the whole dataset, written when the tables are dropped and filled
+# again (flask seed generate, seed.py). It is read with every counter and is part of
+# the version, so the counters starting again at 0 do not match the cache keys and
+# ETags of the previous data.
+DATASET_KEY = "dataset"
+
+def version_statement(key):
+    return select(Version.key, Version.version).where(Version.key.in_([key, DATASET_KEY]))
+
+def version_from(rows, key):
+    versions = dict(rows)
+    return f"{versions.get(DATASET_KEY, 0)}.{versions.get(key, 0)}"
+
+def get_version(key):
+    # one primary key lookup for the counter and the dataset generation
+    return version_from(db.session.execute(version_statement(key)).all(), key)
+
+def new_dataset():
+    """Call after reloading the tables: a generation no earlier dataset used."""
+    db.session.add(Version(key=DATASET_KEY, version=int(time.time())))
+
+def bump_version(key):
+    db.session.execute(insert_or_update(
+        Version,
+        values={"key": key, "version": 1},
+        index_elements=[Version.key],
+        set_={"version": Version.version + 1}
+    ))
+
+def make_etag(key, version, query_string=None):
+    if query_string is None:
+        query_string = request.query_string.decode()
+    raw = f"{key}:{version}:{query_string}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+def etag(key_template):
+    """Adds a strong ETag to 200 responses and answers If-None-Match with 304 before running the view."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if "stream" in request.args:
+                return view(*args, **kwargs)
+
+            key = key_template.format(**kwargs)
+            version = get_version(key)
+            tag = make_etag(key, version)
+            # for @cached: the cached body belongs to this version
+            g.etag_version = version
+
+            # compressed responses carry "<tag>-gzip" or "<tag>-br"
+            for variant in etag_variants(tag):
+                if request.if_none_match.contains(variant):
+                    response = current_app.response_class(status=304)
+                    response.set_etag(variant)
+                    return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(tag)
+            return response
+        return wrapper
+    return decorator